@@ -1,43 +1,167 @@
+import argparse
+import json
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "https://raw.communitydragon.org/latest/"
-FILE_LIST_URL = BASE_URL + "cdragon/files.exported.txt"
+FILE_LIST_PATH = "cdragon/files.exported.txt"
 DOWNLOAD_ROOT = Path("images")
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 64 * 1024
 
-def matches_target(line):
-    return (line.startswith("game/assets/characters/tft13")) or (line.startswith("game/assets/maps/tft/icons/"))
+def make_session(workers):
+    # One keep-alive session shared by every worker so downloads reuse CDragon connections
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=workers, max_retries=Retry(total=2, status=0, backoff_factor=0.3))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
-def download_file(relative_path):
-    url = BASE_URL + relative_path
-    local_path = DOWNLOAD_ROOT / relative_path
+def target_prefixes(tft_set):
+    return (f"game/assets/characters/tft{tft_set}_", "game/assets/maps/tft/icons/")
+
+def list_targets(session, base_url, prefixes):
+    """Stream files.exported.txt and keep the paths under prefixes"""
+    with session.get(base_url + FILE_LIST_PATH, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        return [line for line in response.iter_lines(decode_unicode=True) if line and line.startswith(prefixes)]
+
+def load_manifest(root):
+    path = root / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(root, manifest):
+    # Write then rename so an interrupted run never leaves a truncated manifest
+    path = root / MANIFEST_NAME
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    tmp_path.replace(path)
+
+def file_info(response, size, partial=False):
+    info = {"size": size, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    if partial:
+        info["partial"] = True
+    return info
+
+def download_file(session, base_url, root, relative_path, entry=None, stop=None):
+    """Mirror one file, returning (status, manifest entry).
+
+    Skips files whose local size matches the manifest and whose ETag is
+    unchanged (304). A download cut short leaves a .part file and a partial
+    manifest entry, which the next run resumes with a Range request.
+    """
+    url = base_url + relative_path
+    local_path = root / relative_path
+    part_path = local_path.with_name(local_path.name + ".part")
     local_path.parent.mkdir(parents=True, exist_ok=True)
+    entry = entry or {}
 
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            with open(local_path, "wb") as f:
-                f.write(response.content)
-            print(f"Downloaded: {relative_path}")
-        else:
-            print(f"Failed ({response.status_code}): {relative_path}")
-    except Exception as e:
-        print(f"Error downloading {relative_path}: {e}")
+    headers = {}
+    if local_path.exists():
+        if not entry.get("partial") and entry.get("etag") and entry.get("size") == local_path.stat().st_size:
+            headers["If-None-Match"] = entry["etag"]
+        elif not entry:
+            # Mirrored before the manifest existed: trust it if the size matches
+            head = session.head(url, timeout=10, allow_redirects=True)
+            size = int(head.headers.get("Content-Length", -1))
+            if head.status_code == 200 and size == local_path.stat().st_size:
+                return "skipped", file_info(head, size)
+    elif part_path.exists() and entry.get("partial") and entry.get("etag"):
+        # If-Range makes the server send the whole file instead if it changed since
+        headers["Range"] = f"bytes={part_path.stat().st_size}-"
+        headers["If-Range"] = entry["etag"]
+
+    with session.get(url, headers=headers, timeout=(5, 30), stream=True) as response:
+        if response.status_code == 304:
+            return "skipped", entry
+        if response.status_code not in (200, 206):
+            return f"failed ({response.status_code})", entry or None
+
+        resumed = response.status_code == 206
+        try:
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if stop is not None and stop.is_set():
+                        return "interrupted", file_info(response, None, partial=True)
+                    f.write(chunk)
+        except requests.exceptions.RequestException:
+            return "interrupted", file_info(response, None, partial=True)
+
+        part_path.replace(local_path)
+        return "resumed" if resumed else "downloaded", file_info(response, local_path.stat().st_size)
+
+def mirror(tft_set, root=DOWNLOAD_ROOT, base_url=BASE_URL, workers=16):
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    session = make_session(workers)
 
-def main():
     print("Fetching file list")
-    response = requests.get(FILE_LIST_URL)
-    if response.status_code != 200:
-        print("Failed to fetch files.exported.txt")
+    try:
+        targets = list_targets(session, base_url, target_prefixes(tft_set))
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch files.exported.txt: {e}")
         return
+    print(f"{len(targets)} files for Set {tft_set}")
+
+    manifest = load_manifest(root)
+    counts = {}
+    recorded = set()
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(download_file, session, base_url, root, path, manifest.get(path), stop): path
+        for path in targets
+    }
 
-    lines = response.text.splitlines()
-    targets = [line for line in lines if matches_target(line)]
+    def record(future):
+        recorded.add(future)
+        path = futures[future]
+        try:
+            status, entry = future.result()
+        except Exception as e:
+            status, entry = "error", None
+            print(f"Error downloading {path}: {e}")
+        if entry:
+            manifest[path] = entry
+        counts[status] = counts.get(status, 0) + 1
+        if status not in ("skipped", "error", "interrupted"):
+            print(f"{status.capitalize()}: {path}")
 
-    for path in targets:
-        download_file(path)
+    try:
+        for future in as_completed(futures):
+            record(future)
+    except KeyboardInterrupt:
+        print("\nInterrupted, saving progress...")
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled() and future not in recorded:
+                record(future)
+    finally:
+        executor.shutdown(wait=True)
+        # Saved even on Ctrl-C so the next run can skip or resume what finished
+        save_manifest(root, manifest)
+
+    print("\nFinished: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror TFT character and icon assets from Community Dragon")
+    parser.add_argument("--set", dest="tft_set", type=int, default=14, help="TFT set number, e.g. 14 for tft14 assets")
+    parser.add_argument("--root", default=str(DOWNLOAD_ROOT), help="local mirror directory")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=16, help="concurrent downloads")
+    args = parser.parse_args()
 
-    print("\nAll downloads completed.")
+    mirror(args.tft_set, args.root, args.base_url, args.workers)
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import TopTraits from './topTraits';
 import TopItems from './topItems';
 import TopUnits from './topUnits';
@@ -12,114 +12,109 @@ function App() {
   const [traitsData, setTraitsData] = useState(null);
   const [itemsData, setItemsData] = useState(null);
   const [unitsData, setUnitsData] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const sourceRef = useRef(null);
 
-  const handleSearch = async () => {
+  const applyResults = (data) => {
+    // Extract individual analysis results (used for both provisional and final events)
+    if (data.traits && data.traits.success) {
+      setTraitsData({
+        top_traits: data.traits.top_traits,
+        bottom_traits: data.traits.bottom_traits,
+        riot_id: data.riot_id,
+        tft_set: data.tft_set
+      });
+    }
+    
+    if (data.items && data.items.success) {
+      setItemsData({
+        top_items: data.items.top_items,
+        bottom_items: data.items.bottom_items,
+        riot_id: data.riot_id,
+        tft_set: data.tft_set
+      });
+    }
+    
+    if (data.units && data.units.success) {
+      setUnitsData({
+        top_units: data.units.top_units || [],
+        total_games_analyzed: data.units.total_games_analyzed || 0,
+        total_unit_instances: data.units.total_unit_instances || 0,
+        riot_id: data.riot_id,
+        tft_set: data.tft_set
+      });
+    }
+  };
+
+  const handleSearch = () => {
     if (!gameName.trim() || !tagLine.trim()) {
       setError('Please enter both Game Name and Tag Line');
       return;
     }
 
+    // A new search replaces the one in flight, so its late events can't overwrite these results
+    if (sourceRef.current) {
+      sourceRef.current.close();
+    }
+
     setLoading(true);
     setError('');
+    setProgress(null);
     setTraitsData(null);
     setItemsData(null);
     setUnitsData(null);
 
-    try {
-      const baseUrl = 'https://tft-stat-tool.onrender.com';
-      const params = `gameName=${encodeURIComponent(gameName.trim())}&tagLine=${encodeURIComponent(tagLine.trim())}`;
-      
-      const response = await fetch(`${baseUrl}/analyze-all-riot-id?${params}`, { method: 'GET' });
+    const baseUrl = 'https://tft-stat-tool.onrender.com';
+    const params = `gameName=${encodeURIComponent(gameName.trim())}&tagLine=${encodeURIComponent(tagLine.trim())}`;
+    
+    // Results arrive incrementally: fetch progress, provisional aggregates, then the final result
+    const source = new EventSource(`${baseUrl}/analyze-all-riot-id/stream?${params}`);
+    sourceRef.current = source;
+    let finished = false;
+    const finish = () => {
+      finished = true;
+      source.close();
+      setLoading(false);
+      setProgress(null);
+    };
+    
+    source.addEventListener('progress', (event) => {
+      setProgress(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('partial', (event) => {
+      applyResults(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('result', (event) => {
+      const data = JSON.parse(event.data);
+      applyResults(data);
       
-      if (response.ok) {
-        const data = await response.json();
-        
-        // DEBUG: Log the entire response
-        console.log('FULL RESPONSE:', JSON.stringify(data, null, 2));
-        console.log('Units section:', data.units);
-        console.log('Units success:', data.units?.success);
-        console.log('Units top_units:', data.units?.top_units);
-        
-        // Extract individual analysis results
-        if (data.traits && data.traits.success) {
-          setTraitsData({
-            top_traits: data.traits.top_traits,
-            bottom_traits: data.traits.bottom_traits,
-            riot_id: data.riot_id,
-            tft_set: data.tft_set
-          });
-        }
-        
-        if (data.items && data.items.success) {
-          setItemsData({
-            top_items: data.items.top_items,
-            bottom_items: data.items.bottom_items,
-            riot_id: data.riot_id,
-            tft_set: data.tft_set
-          });
-        }
-        
-        // Units data
-        console.log('Checking units data...');
-        console.log('data.units exists:', !!data.units);
-        console.log('data.units.success:', data.units?.success);
-        console.log('data.units.top_units exists:', !!data.units?.top_units);
-        console.log('data.units.top_units length:', data.units?.top_units?.length);
-        
-        if (data.units && data.units.success) {
-          console.log('Setting units data - SUCCESS PATH');
-          const unitsDataToSet = {
-            top_units: data.units.top_units,
-            total_games_analyzed: data.units.total_games_analyzed,
-            total_unit_instances: data.units.total_unit_instances,
-            riot_id: data.riot_id,
-            tft_set: data.tft_set
-          };
-          console.log('unitsDataToSet:', unitsDataToSet);
-          setUnitsData(unitsDataToSet);
-          console.log('Units data successfully set:', unitsDataToSet);
-        } else if (data.units) {
-          console.log('Setting units data - FALLBACK PATH (no success check)');
-          const unitsDataToSet = {
-            top_units: data.units.top_units || [],
-            total_games_analyzed: data.units.total_games_analyzed || 0,
-            total_unit_instances: data.units.total_unit_instances || 0,
-            riot_id: data.riot_id,
-            tft_set: data.tft_set
-          };
-          console.log('unitsDataToSet (fallback):', unitsDataToSet);
-          setUnitsData(unitsDataToSet);
-        } else if (data.top_units) {
-          const unitsDataToSet = {
-            top_units: data.top_units,
-            total_games_analyzed: data.total_games_analyzed,
-            total_unit_instances: data.total_unit_instances,
-            riot_id: data.riot_id,
-            tft_set: data.tft_set
-          };
-          setUnitsData(unitsDataToSet);
-        }
-        
-        // Switch to first successful tab
-        if (data.traits && data.traits.success) {
-          setActiveTab('traits');
-        } else if (data.items && data.items.success) {
-          setActiveTab('items');
-        } else if (data.units && data.units.top_units !== undefined) {
-          setActiveTab('units');
-        }
-        
-      } else {
-        const errorText = await response.text();
-        throw new Error(`Analysis failed: ${response.status} - ${errorText}`);
+      // Switch to first successful tab
+      if (data.traits && data.traits.success) {
+        setActiveTab('traits');
+      } else if (data.items && data.items.success) {
+        setActiveTab('items');
+      } else if (data.units && data.units.top_units !== undefined) {
+        setActiveTab('units');
       }
-      
-    } catch (err) {
-      console.error('Full error details:', err);
-      setError(err.message || 'Analysis failed. Please check your Riot ID and try again.');
-    } finally {
-      setLoading(false);
-    }
+      finish();
+    });
+    
+    source.addEventListener('analysis-error', (event) => {
+      const data = JSON.parse(event.data);
+      console.error('Analysis error:', data);
+      setError(data.error || 'Analysis failed. Please check your Riot ID and try again.');
+      finish();
+    });
+    
+    // Connection-level failures (network, 4xx/5xx before the stream starts)
+    source.onerror = (err) => {
+      if (finished) return;
+      console.error('Stream error:', err);
+      setError('Analysis failed. Please check your Riot ID and try again.');
+      finish();
+    };
   };
 
   const handleKeyPress = (e) => {
@@ -169,6 +164,13 @@ function App() {
           {loading ? 'Analyzing...' : 'Search'}
         </button>
         
+        {/* Fetch Progress */}
+        {loading && progress && progress.total > 0 && (
+          <div className="text-xs text-gray-500 mt-2">
+            Fetched {progress.fetched} of {progress.total} new matches
+          </div>
+        )}
+        
         {/* Error Display */}
         {error && (
           <div className="alert alert-error mt-4 max-w-md">
@@ -214,21 +216,21 @@ function App() {
         {activeTab === 'traits' && (
           <TopTraits 
             data={traitsData} 
-            loading={loading}
+            loading={loading && !traitsData}
             hasSearched={!!traitsData || !!error}
           />
         )}
         {activeTab === 'items' && (
           <TopItems 
             data={itemsData} 
-            loading={loading}
+            loading={loading && !itemsData}
             hasSearched={!!itemsData || !!error}
           />
         )}
         {activeTab === 'units' && (
           <TopUnits 
             data={unitsData} 
-            loading={loading}
+            loading={loading && !unitsData}
             hasSearched={!!unitsData || !!error}
           />
         )}
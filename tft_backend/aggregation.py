@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Columnar helpers shared by the analyzers. They work directly on the
+# integer-encoded MatchTable arrays: counts are bincounts over entity IDs
+# instead of Python loops over rows. Results keep first-appearance order so
+# ties sort exactly as the old row-by-row loops did.
+
+def first_seen_order(ids):
+    """Distinct IDs ordered by where they first occur in `ids`"""
+    unique, first = np.unique(ids, return_index=True)
+    return unique[np.argsort(first, kind='stable')]
+
+def placement_rates(ids, placements, vocab, label, min_count=10):
+    """Top/bottom 4 rates per entity ID, keeping entities seen more than min_count times.
+
+    `ids` and `placements` are aligned flat arrays (one entry per appearance).
+    Returns a DataFrame with columns [label, 'Top 4 Rate', 'Bottom 4 Rate', 'Games Played'],
+    or None if nothing clears the threshold.
+    """
+    counts = np.bincount(ids, minlength=len(vocab))
+    valid = counts > min_count
+    if not valid.any():
+        return None
+
+    keep = valid[ids]
+    ids = ids[keep]
+    total = counts
+    top = np.bincount(ids, weights=placements[keep] <= 4, minlength=len(vocab)).astype(np.int64)
+
+    order = first_seen_order(ids)
+    return pd.DataFrame({
+        label: vocab.lookup(order),
+        'Top 4 Rate': top[order] / total[order],
+        'Bottom 4 Rate': (total[order] - top[order]) / total[order],
+        'Games Played': total[order]
+    })
+
+def top_bottom(rates, n=10):
+    """Top n records by Top 4 Rate and by Bottom 4 Rate from a placement_rates-style frame"""
+    top = rates.sort_values(by='Top 4 Rate', ascending=False).head(n).to_dict(orient='records')
+    bottom = rates.sort_values(by='Bottom 4 Rate', ascending=False).head(n).to_dict(orient='records')
+    return top, bottom
+
+def trait_rates(table, min_count=10):
+    return placement_rates(table.trait_ids, table.trait_placement(), table.traits, 'Trait', min_count)
+
+def item_rates(table, min_count=10):
+    return placement_rates(table.item_ids, table.item_placement(), table.items, 'Item', min_count)
@@ -0,0 +1,247 @@
+import argparse
+import json
+import math
+import os
+import numpy as np
+from itertools import combinations
+from dotenv import load_dotenv
+from match_data import configured_set
+from match_table import MatchTable, as_match_table
+from result_cache import cached_analysis
+
+load_dotenv()
+# Defaults follow TFT.ipynb's apriori cells: lift above 1, and near-certain rules
+# (a unit implying its own trait) dropped by the confidence cap
+RULES_MIN_SUPPORT = float(os.getenv("RULES_MIN_SUPPORT", "0.1"))
+RULES_MAX_LEN = int(os.getenv("RULES_MAX_LEN", "3"))
+# Largest max_len a request may ask for; itemset counts grow exponentially with it
+RULES_MAX_LEN_LIMIT = int(os.getenv("RULES_MAX_LEN_LIMIT", "5"))
+RULES_MIN_CONFIDENCE = float(os.getenv("RULES_MIN_CONFIDENCE", "0.5"))
+RULES_MAX_CONFIDENCE = float(os.getenv("RULES_MAX_CONFIDENCE", "0.99"))
+RULES_MIN_LIFT = float(os.getenv("RULES_MIN_LIFT", "1.0"))
+
+# Which per-board lists make up a transaction
+RULE_KINDS = ('traits', 'units', 'all')
+
+class FPNode:
+    __slots__ = ('item', 'parent', 'children', 'counts')
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.parent = parent
+        self.children = {}
+        self.counts = [0, 0, 0]
+
+def encode_transactions(table, kind='traits', min_count=1):
+    """Return (names, {sorted item ID tuple: [boards, top 4 boards, placement sum]}) for a MatchTable.
+
+    Items seen fewer than min_count times are dropped up front, and boards
+    left with the same set of traits/units collapse into one weighted
+    transaction, which is what keeps corpus-sized inputs cheap to mine.
+    """
+    table = as_match_table(table)
+    if kind not in RULE_KINDS:
+        raise Exception(f"kind must be one of: {', '.join(RULE_KINDS)}")
+
+    lists = []
+    if kind in ('traits', 'all'):
+        lists.append((table.trait_offsets, table.trait_ids, table.traits, 0))
+    if kind in ('units', 'all'):
+        # Unit IDs go after the trait IDs when both are mined together
+        lists.append((table.unit_offsets, table.unit_ids, table.units, len(table.traits) if kind == 'all' else 0))
+
+    names = []
+    rows = [set() for _ in range(len(table))]
+    for offsets, ids, vocabulary, shift in lists:
+        names.extend(vocabulary.names)
+        # Appearances bound board counts from above (a unit can be fielded twice), so this never drops a frequent item
+        keep = np.bincount(ids, minlength=len(vocabulary)) >= min_count
+        board = np.repeat(np.arange(len(table)), np.diff(offsets))
+        kept = keep[ids]
+        for row, item in zip(board[kept].tolist(), (ids[kept] + shift).tolist()):
+            rows[row].add(item)
+
+    transactions = {}
+    for items, placement in zip(rows, table.placement.tolist()):
+        key = tuple(sorted(items))
+        counts = transactions.get(key)
+        if counts is None:
+            transactions[key] = [1, 1 if placement <= 4 else 0, placement]
+        else:
+            counts[0] += 1
+            counts[1] += 1 if placement <= 4 else 0
+            counts[2] += placement
+    return names, transactions
+
+def fp_growth(transactions, min_count, max_len=RULES_MAX_LEN):
+    """Frequent itemsets of up to max_len items seen on at least min_count boards.
+
+    transactions is [(item IDs, [boards, top 4 boards, placement sum])]; returns
+    {frozenset of item IDs: [boards, top 4 boards, placement sum]}. Every node
+    of the FP-tree carries all three counts, so top 4 rates need no second pass.
+    """
+    itemsets = {}
+    _mine(list(transactions), (), min_count, max_len, itemsets)
+    return itemsets
+
+def _mine(transactions, suffix, min_count, max_len, itemsets):
+    totals = {}
+    for items, (games, top4, placement_sum) in transactions:
+        for item in items:
+            entry = totals.get(item)
+            if entry is None:
+                totals[item] = [games, top4, placement_sum]
+            else:
+                entry[0] += games
+                entry[1] += top4
+                entry[2] += placement_sum
+    frequent = {item: counts for item, counts in totals.items() if counts[0] >= min_count}
+    if not frequent:
+        return
+
+    # Most frequent items nearest the root so shared prefixes collapse
+    order = sorted(frequent, key=lambda item: (-frequent[item][0], item))
+    rank = {item: position for position, item in enumerate(order)}
+    root = FPNode(None, None)
+    nodes = {item: [] for item in order}
+    for items, (games, top4, placement_sum) in transactions:
+        node = root
+        for item in sorted((item for item in items if item in rank), key=rank.__getitem__):
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = FPNode(item, node)
+                nodes[item].append(child)
+            counts = child.counts
+            counts[0] += games
+            counts[1] += top4
+            counts[2] += placement_sum
+            node = child
+
+    for item in reversed(order):
+        itemset = suffix + (item,)
+        itemsets[frozenset(itemset)] = frequent[item]
+        if len(itemset) >= max_len:
+            continue
+        # Conditional pattern base: each path above the item's nodes, weighted by that node
+        base = []
+        for node in nodes[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                base.append((path, node.counts))
+        if base:
+            _mine(base, itemset, min_count, max_len, itemsets)
+
+def association_rules(itemsets, boards, min_confidence=RULES_MIN_CONFIDENCE, max_confidence=RULES_MAX_CONFIDENCE,
+                      min_lift=RULES_MIN_LIFT):
+    """[(antecedent, consequent, counts, support, confidence, lift)] for every split of every frequent itemset"""
+    rules = []
+    for itemset, counts in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        items = sorted(itemset)
+        for size in range(1, len(items)):
+            # Subsets of a frequent itemset are frequent too, so both sides are in itemsets
+            for antecedent in combinations(items, size):
+                consequent = tuple(item for item in items if item not in antecedent)
+                confidence = counts[0] / itemsets[frozenset(antecedent)][0]
+                lift = confidence / (itemsets[frozenset(consequent)][0] / boards)
+                if min_confidence <= confidence <= max_confidence and lift >= min_lift:
+                    rules.append((antecedent, consequent, counts, counts[0] / boards, confidence, lift))
+    return rules
+
+def mine_rules(table, kind='traits', min_support=RULES_MIN_SUPPORT, max_len=RULES_MAX_LEN,
+               min_confidence=RULES_MIN_CONFIDENCE, limit=10):
+    """Top and bottom association rules over a MatchTable's boards, ranked by Top 4 / Bottom 4 rate"""
+    table = as_match_table(table)
+    boards = len(table)
+    if boards == 0:
+        raise Exception("Insufficient data for rule mining")
+
+    # At least two boards, so a single game never counts as a pattern
+    min_count = max(2, math.ceil(min_support * boards))
+    names, transactions = encode_transactions(table, kind, min_count)
+    itemsets = fp_growth(transactions.items(), min_count, max(2, max_len))
+    rules = association_rules(itemsets, boards, min_confidence)
+    if not rules:
+        raise Exception(f"No {kind} rules found with sufficient support")
+
+    records = []
+    for antecedent, consequent, (games, top4, placement_sum), support, confidence, lift in rules:
+        records.append({
+            'antecedents': [names[item] for item in antecedent],
+            'consequents': [names[item] for item in consequent],
+            'support': support,
+            'confidence': confidence,
+            'lift': lift,
+            'Top 4 Rate': top4 / games,
+            'Bottom 4 Rate': (games - top4) / games,
+            'Average Placement': placement_sum / games,
+            'Games Played': games
+        })
+
+    # sorted() is stable, so ties keep itemset discovery order
+    top_rules = sorted(records, key=lambda r: (-r['Top 4 Rate'], -r['lift']))[:limit]
+    bottom_rules = sorted(records, key=lambda r: (-r['Bottom 4 Rate'], -r['lift']))[:limit]
+    print(f"Mined {len(itemsets)} frequent {kind} itemsets and {len(records)} rules from {boards} boards")
+    return {
+        'kind': kind,
+        'boards_analyzed': boards,
+        'frequent_itemsets': len(itemsets),
+        'rules_found': len(records),
+        'top_rules': top_rules,
+        'bottom_rules': bottom_rules
+    }
+
+def run_analysis(puuid, kind='traits', min_support=RULES_MIN_SUPPORT, max_len=RULES_MAX_LEN,
+                 min_confidence=RULES_MIN_CONFIDENCE, limit=10, progress=None):
+    """Mine association rules over a player's match history"""
+    try:
+        tft_set = configured_set()
+        print(f"Starting {kind} rule mining for PUUID: {puuid[:8]} (TFT Set {tft_set})...")
+
+        params = (kind, min_support, max_len, min_confidence, limit)
+        return cached_analysis(puuid, tft_set, 'rules', params,
+                               lambda table: mine_rules(table, kind, min_support, max_len, min_confidence, limit),
+                               progress)
+
+    except Exception as e:
+        print(f"Rule mining failed: {str(e)}")
+        raise
+
+def main():
+    from match_cache import match_cache
+    from streaming_aggregation import iter_boards, iter_match_files
+
+    parser = argparse.ArgumentParser(description="Mine trait/unit association rules over stored match archives")
+    parser.add_argument("paths", nargs="*", help="match .json/.jsonl(.gz) files or directories")
+    parser.add_argument("--cache", action="store_true", help="read every match in the local match cache")
+    parser.add_argument("--puuid", help="only this player's boards (default: every board)")
+    parser.add_argument("--set", dest="tft_set", type=int, default=configured_set())
+    parser.add_argument("--kind", choices=RULE_KINDS, default='traits')
+    parser.add_argument("--min-support", type=float, default=RULES_MIN_SUPPORT)
+    parser.add_argument("--max-len", type=int, default=RULES_MAX_LEN)
+    parser.add_argument("--min-confidence", type=float, default=RULES_MIN_CONFIDENCE)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    if not args.paths and not args.cache:
+        parser.error("give match files/directories or --cache")
+
+    matches = iter_match_files(args.paths) if args.paths else (payload for _, payload in match_cache.iter_matches())
+    table = MatchTable.from_rows(iter_boards(matches, args.puuid, args.tft_set))
+    results = mine_rules(table, args.kind, args.min_support, args.max_len, args.min_confidence, args.limit)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
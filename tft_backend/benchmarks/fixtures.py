@@ -0,0 +1,87 @@
+import glob
+import json
+import os
+import random
+import zlib
+
+# Synthetic Set 14 pools. Names follow Riot's API naming so CDragon-style
+# lookups and the 'TFT14_' prefix stripping in unit_analysis behave normally.
+TRAITS = [f"TFT14_Trait{i}" for i in range(28)]
+UNITS = [f"TFT14_Champion{i}" for i in range(60)]
+ITEMS = [f"TFT_Item_Item{i}" for i in range(45)]
+
+BASE_GAME_DATETIME = 1735689600000  # 2025-01-01, in milliseconds
+
+def bench_puuid(player):
+    return f"bench-puuid-{player:06d}"
+
+def player_match_ids(player, count):
+    """Match IDs for a synthetic player, newest first"""
+    return [f"NA1_{player:06d}{index:05d}" for index in reversed(range(count))]
+
+def synthetic_match(match_id, tft_set=14):
+    """Deterministic match-v1 payload for a match ID produced by player_match_ids"""
+    rng = random.Random(zlib.crc32(match_id.encode('utf-8')))
+    player = int(match_id[4:10])
+    index = int(match_id[10:])
+
+    puuids = [bench_puuid(player)] + [f"bench-lobby-{rng.randrange(10 ** 6):06d}" for _ in range(7)]
+    rng.shuffle(puuids)
+    placements = list(range(1, 9))
+    rng.shuffle(placements)
+
+    participants = []
+    for puuid, placement in zip(puuids, placements):
+        units = []
+        for character_id in rng.sample(UNITS, rng.randint(5, 10)):
+            units.append({
+                'character_id': character_id,
+                'itemNames': rng.sample(ITEMS, rng.choice([0, 0, 1, 2, 3, 3])),
+                'rarity': rng.randint(0, 6),
+                'tier': rng.randint(1, 3)
+            })
+        participants.append({
+            'puuid': puuid,
+            'placement': placement,
+            'level': rng.randint(6, 10),
+            'gold_left': rng.randint(0, 60),
+            'last_round': rng.randint(20, 40),
+            'traits': [
+                {'name': name, 'num_units': rng.randint(1, 6), 'style': rng.randint(0, 4), 'tier_current': rng.randint(1, 3)}
+                for name in rng.sample(TRAITS, rng.randint(3, 9))
+            ],
+            'units': units
+        })
+
+    return {
+        'metadata': {'data_version': '6', 'match_id': match_id, 'participants': puuids},
+        'info': {
+            'game_datetime': BASE_GAME_DATETIME + index * 40 * 60 * 1000,
+            'game_length': rng.uniform(1500, 2400),
+            'queue_id': 1100,
+            'tft_set_number': tft_set,
+            'participants': participants
+        }
+    }
+
+def synthetic_static_data():
+    """Minimal CDragon en_us.json shape covering the synthetic units"""
+    rng = random.Random(14)
+    champions = [
+        {'apiName': name, 'name': name.split('_')[1], 'traits': [t.split('_')[1] for t in rng.sample(TRAITS, 2)]}
+        for name in UNITS
+    ]
+    return {
+        'items': [{'apiName': name, 'name': name.split('_')[-1], 'icon': f"ASSETS/Maps/TFT/Icons/{name}.tex"} for name in ITEMS],
+        'setData': [{'number': 14, 'mutator': 'TFTSet14', 'champions': champions, 'traits': []}],
+        'sets': {'14': {'champions': champions, 'traits': []}}
+    }
+
+def load_recorded_matches(directory):
+    """Load recorded match-v1 payloads (one JSON file per match) keyed by match ID"""
+    matches = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            match_data = json.load(f)
+        matches[match_data['metadata']['match_id']] = match_data
+    return matches
@@ -0,0 +1,180 @@
+"""Local stand-in for Riot's account-v1 and match-v1 endpoints (plus the CDragon static JSON).
+
+Point the backend at it with RIOT_API_BASE_URL and CDRAGON_BASE_URL. It serves
+synthetic matches generated on demand (see fixtures.py) or recorded match
+payloads, with configurable latency and 429 injection.
+
+    python benchmarks/mock_riot.py --port 8099 --latency-ms 40 --rate-429 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from fixtures import bench_puuid, load_recorded_matches, player_match_ids, synthetic_match, synthetic_static_data
+
+class MockRiotServer:
+    def __init__(self, port=0, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0, retry_after=1,
+                 history_size=50, recorded_matches=None, seed=0, patch_version='14.24.1'):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.history_size = history_size
+        self.patch_version = patch_version
+        self.recorded_matches = recorded_matches or {}
+        self.static_data = json.dumps(synthetic_static_data()).encode('utf-8')
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'account': 0, 'match_ids': 0, 'match': 0, 'static': 0, '429': 0}
+
+        self.recorded_ids = {}
+        for match_id, match_data in sorted(self.recorded_matches.items(),
+                                           key=lambda item: -item[1]['info'].get('game_datetime', 0)):
+            for puuid in match_data['metadata']['participants']:
+                self.recorded_ids.setdefault(puuid, []).append(match_id)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def reset_counts(self):
+        with self.lock:
+            for key in self.counts:
+                self.counts[key] = 0
+
+    def match_ids_for(self, puuid):
+        if puuid in self.recorded_ids:
+            return self.recorded_ids[puuid]
+        if puuid.startswith('bench-puuid-'):
+            return player_match_ids(int(puuid.rsplit('-', 1)[1]), self.history_size)
+        return []
+
+    def match(self, match_id):
+        if match_id in self.recorded_matches:
+            return self.recorded_matches[match_id]
+        if match_id.startswith('NA1_') and len(match_id) == 15 and match_id[4:].isdigit():
+            return synthetic_match(match_id)
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real API, so connection pooling shows up in the numbers
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = [unquote(p) for p in parsed.path.strip('/').split('/')]
+                query = parse_qs(parsed.query)
+
+                with server.lock:
+                    delay = server.latency_ms + server.rng.uniform(0, server.jitter_ms)
+                    throttled = server.rng.random() < server.rate_429
+                    if throttled:
+                        server.counts['429'] += 1
+                if delay:
+                    time.sleep(delay / 1000)
+                if throttled:
+                    return self._send(429, {'status': {'status_code': 429, 'message': 'Rate limit exceeded'}},
+                                      {'Retry-After': str(server.retry_after)})
+
+                if parts[:5] == ['riot', 'account', 'v1', 'accounts', 'by-riot-id'] and len(parts) == 7:
+                    server.count('account')
+                    game_name, tag_line = parts[5], parts[6]
+                    if game_name.startswith('Bench') and game_name[5:].isdigit():
+                        return self._send(200, {'puuid': bench_puuid(int(game_name[5:])),
+                                                'gameName': game_name, 'tagLine': tag_line})
+                    if game_name in server.recorded_ids:
+                        return self._send(200, {'puuid': game_name, 'gameName': game_name, 'tagLine': tag_line})
+                    return self._send(404, {'status': {'status_code': 404, 'message': 'Data not found'}})
+
+                if parts[:4] == ['tft', 'match', 'v1', 'matches'] and len(parts) == 7 and parts[4] == 'by-puuid':
+                    server.count('match_ids')
+                    match_ids = server.match_ids_for(parts[5])
+                    if 'startTime' in query:
+                        start_time = int(query['startTime'][0]) * 1000
+                        match_ids = [m for m in match_ids if server.match(m)['info']['game_datetime'] >= start_time]
+                    start = int(query.get('start', ['0'])[0])
+                    count = int(query.get('count', ['20'])[0])
+                    return self._send(200, match_ids[start:start + count])
+
+                if parts[:4] == ['tft', 'match', 'v1', 'matches'] and len(parts) == 5:
+                    server.count('match')
+                    match_data = server.match(parts[4])
+                    if match_data is None:
+                        return self._send(404, {'status': {'status_code': 404, 'message': 'Data not found'}})
+                    return self._send(200, match_data)
+
+                if parsed.path.endswith('/content-metadata.json'):
+                    return self._send(200, {'version': server.patch_version})
+
+                if parsed.path.endswith('/cdragon/tft/en_us.json'):
+                    server.count('static')
+                    return self._send(200, server.static_data)
+
+                return self._send(404, {'status': {'status_code': 404, 'message': 'Unknown route'}})
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Riot API for local benchmarking")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of answering 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--history-size", type=int, default=50, help="matches per synthetic player")
+    parser.add_argument("--recorded", help="directory of recorded match JSON files to serve")
+    args = parser.parse_args()
+
+    server = MockRiotServer(
+        port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429,
+        retry_after=args.retry_after, history_size=args.history_size,
+        recorded_matches=load_recorded_matches(args.recorded) if args.recorded else None
+    )
+    print(f"Mock Riot API listening on {server.url}")
+    print(f"  RIOT_API_BASE_URL={server.url} CDRAGON_BASE_URL={server.url}/latest")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Benchmark the analysis pipeline without Riot credentials or network access.
+
+Starts benchmarks/mock_riot.py in-process, points the backend at it through
+RIOT_API_BASE_URL/CDRAGON_BASE_URL with a throwaway CACHE_DIR, and reports:
+
+  * end-to-end latency of every endpoint in main.py, cold (new player) and warm
+  * concurrent match download throughput
+  * parse/encode and aggregation throughput of each analyzer at 50/500/5,000 matches
+
+    python benchmarks/run_benchmarks.py --latency-ms 30 --rate-429 0.01 --json results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fixtures import bench_puuid, load_recorded_matches, player_match_ids, synthetic_match
+from mock_riot import MockRiotServer
+
+def get(client, path):
+    response = client.get(path)
+    return response.status_code, response.get_data(as_text=True)
+
+def get_stream(client, path):
+    """Read the event stream to the end; a failed analysis arrives as an event, not a status"""
+    response = client.get(path)
+    body = response.get_data(as_text=True)
+    for event in body.split('\n\n'):
+        if event.startswith('event: analysis-error'):
+            return json.loads(event.split('data: ', 1)[1])['status'], body
+    return response.status_code, body
+
+def run_job(client, path):
+    """Submit a background job and poll it until it finishes"""
+    response = client.post(path)
+    if response.status_code != 202:
+        return response.status_code, response.get_data(as_text=True)
+    status_url = response.get_json()['status_url']
+    while True:
+        job = client.get(status_url).get_json()
+        if job['status'] == 'done':
+            return 200, job
+        if job['status'] == 'failed':
+            return job['error_status'], job['error']
+        time.sleep(0.005)
+
+RIOT_ID = 'gameName=Bench{player}&tagLine=BENCH'
+ENDPOINTS = [
+    ('analyze-all-riot-id', get, '/analyze-all-riot-id?' + RIOT_ID),
+    ('analyze-all-riot-id/stream', get_stream, '/analyze-all-riot-id/stream?' + RIOT_ID),
+    ('jobs', run_job, '/jobs?analysis=all&' + RIOT_ID),
+    ('analyze-traits-riot-id', get, '/analyze-traits-riot-id?' + RIOT_ID),
+    ('analyze-items-riot-id', get, '/analyze-items-riot-id?' + RIOT_ID),
+    ('analyze-units-riot-id', get, '/analyze-units-riot-id?' + RIOT_ID),
+    ('analyze-rules-riot-id', get, '/analyze-rules-riot-id?' + RIOT_ID),
+    ('analyze-traits', get, '/analyze-traits?puuid={puuid}'),
+    ('analyze-items', get, '/analyze-items?puuid={puuid}'),
+    ('analyze-units', get, '/analyze-units?puuid={puuid}'),
+    ('analyze-rules', get, '/analyze-rules?puuid={puuid}'),
+    # Reads whatever meta_crawl.py has stored, so it costs no Riot calls
+    ('meta', get, '/meta?kind=traits'),
+]
+
+def timed(fn, *args, **kwargs):
+    """Run fn with backend logging silenced, returning (result, seconds)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+def summarize(samples):
+    if not samples:
+        return None
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 2),
+        'min_ms': round(min(samples) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+        'runs': len(samples)
+    }
+
+def bench_endpoints(client, server, runs, next_player):
+    """Cold (new player) and warm latency per endpoint.
+
+    Only 200s are timed. Other statuses (e.g. 503 once the mock's 429s exhaust
+    the backend's retries) are counted per endpoint so a --rate-429 run finishes.
+    """
+    results = {}
+    for name, fetch, template in ENDPOINTS:
+        cold, warm, calls = [], [], []
+        errors = Counter()
+        for _ in range(runs):
+            player = next_player()
+            path = template.format(player=player, puuid=bench_puuid(player))
+            server.reset_counts()
+            (status, body), seconds = timed(fetch, client, path)
+            calls.append(dict(server.counts))
+            if status != 200:
+                errors[f"cold {status}"] += 1
+                print(f"  {path} returned {status}: {' '.join(str(body).split())[:200]}")
+                continue
+            cold.append(seconds)
+            (status, _), seconds = timed(fetch, client, path)
+            if status != 200:
+                errors[f"warm {status}"] += 1
+                continue
+            warm.append(seconds)
+        results[name] = {'cold': summarize(cold), 'warm': summarize(warm), 'api_calls_cold': calls[-1],
+                         'errors': dict(errors)}
+        medians = "   ".join(f"{phase} {results[name][phase]['median_ms']:>9.1f} ms" if results[name][phase]
+                             else f"{phase} {'-':>9} ms" for phase in ('cold', 'warm'))
+        print(f"  {name:<28} {medians}   calls {calls[-1]}" + (f"   errors {dict(errors)}" if errors else ""))
+    return results
+
+def bench_fetch(match_data, sizes, next_player):
+    results = {}
+    for size in sizes:
+        match_ids = player_match_ids(next_player(), size)
+        _, seconds = timed(match_data.fetch_matches, match_ids)
+        results[size] = {'seconds': round(seconds, 3), 'matches_per_second': round(size / seconds, 1)}
+        print(f"  fetch {size:>6} matches   {seconds:>8.3f} s   {size / seconds:>9.1f} matches/s")
+    return results
+
+def bench_aggregation(modules, sizes, recorded):
+    match_data, match_table, trait_analysis, item_analysis, unit_analysis = modules
+    results = {}
+    for size in sizes:
+        if recorded:
+            payloads = list(recorded.values())[:size]
+            # The player in the most recorded matches, so the run covers as many of them as possible
+            puuid = Counter(p for payload in payloads for p in payload['metadata']['participants']).most_common(1)[0][0]
+        else:
+            puuid = bench_puuid(0)
+            payloads = [synthetic_match(match_id) for match_id in player_match_ids(0, size)]
+
+        def encode():
+            rows = [match_data.parse_participant(p, puuid) for p in payloads]
+            table = match_table.MatchTable.from_rows(row for row in rows if row is not None)
+            return table.select(table.set_number == match_data.configured_set())
+
+        table, encode_seconds = timed(encode)
+        stages = {'parse_encode': encode_seconds}
+        _, stages['traits'] = timed(trait_analysis.analyze_traits, table)
+        _, stages['items'] = timed(item_analysis.analyze_items, table)
+        _, stages['units'] = timed(unit_analysis.analyze_units, table)
+
+        # Fewer recorded matches than requested means a smaller run, not a faster one
+        matches = len(payloads)
+        results[size] = {
+            stage: {'seconds': round(seconds, 4), 'matches_per_second': round(matches / seconds, 1)}
+            for stage, seconds in stages.items()
+        }
+        results[size]['matches'] = matches
+        results[size]['table_bytes'] = table.nbytes()
+        print(f"  {matches:>6} matches   " + "   ".join(
+            f"{stage} {seconds * 1000:>8.1f} ms" for stage, seconds in stages.items()
+        ))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TFT analysis endpoints and aggregations")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mock API latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability the mock answers 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--history-size", type=int, default=50, help="matches per player for endpoint runs")
+    parser.add_argument("--runs", type=int, default=3, help="cold/warm runs per endpoint")
+    parser.add_argument("--sizes", default="50,500,5000", help="match counts for throughput runs")
+    parser.add_argument("--fetch-sizes", default="50,500", help="match counts for download throughput runs")
+    parser.add_argument("--rate-limits", default="100000:1", help="RIOT_RATE_LIMITS for the backend")
+    parser.add_argument("--workers", type=int, default=8, help="MATCH_FETCH_WORKERS for the backend")
+    parser.add_argument("--recorded", help="directory of recorded match JSON files for the aggregation runs")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    recorded = load_recorded_matches(args.recorded) if args.recorded else None
+    server = MockRiotServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429,
+                            retry_after=args.retry_after, history_size=args.history_size,
+                            recorded_matches=recorded).start()
+
+    # Configure the backend before importing it; every module reads its settings at import time
+    cache_dir = tempfile.mkdtemp(prefix="tft-bench-")
+    os.environ.update({
+        'RIOT_API_KEY': os.environ.get('RIOT_API_KEY', 'bench'),
+        'RIOT_API_BASE_URL': server.url,
+        'CDRAGON_BASE_URL': f"{server.url}/latest",
+        'CACHE_DIR': cache_dir,
+        'RIOT_RATE_LIMITS': args.rate_limits,
+        'MATCH_FETCH_WORKERS': str(args.workers),
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main as backend
+        import match_data
+        import match_table
+        import trait_analysis
+        import item_analysis
+        import unit_analysis
+
+    players = iter(range(1, 10 ** 6))
+    next_player = lambda: next(players)
+    results = {'config': vars(args), 'cache_dir': cache_dir}
+
+    try:
+        if not args.skip_endpoints:
+            print(f"Endpoints ({args.history_size} matches/player, {args.latency_ms} ms mock latency)")
+            results['endpoints'] = bench_endpoints(backend.app.test_client(), server, args.runs, next_player)
+
+        fetch_sizes = [int(size) for size in args.fetch_sizes.split(',') if size]
+        if fetch_sizes:
+            print("Match download")
+            results['fetch'] = bench_fetch(match_data, fetch_sizes, next_player)
+
+        print("Aggregation")
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        results['aggregation'] = bench_aggregation(
+            (match_data, match_table, trait_analysis, item_analysis, unit_analysis), sizes, recorded
+        )
+        results['mock_429s'] = server.counts['429']
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from aggregation import first_seen_order
+from match_data import trait_prefix
+from match_table import as_match_table, lengths_to_offsets
+
+ITEM_SLOTS = 3  # Item sets only look at a unit's first three item slots
+
+def placement_frame(stats, label):
+    """{key: [games, placement sum]} as the groupby(label)['placement'].agg(['mean', 'count']) frame"""
+    keys = sorted(stats)
+    return pd.DataFrame({
+        label: pd.Series(keys, dtype=object),
+        'mean': pd.Series([stats[key][1] / stats[key][0] for key in keys], dtype='float64'),
+        'count': pd.Series([stats[key][0] for key in keys], dtype='int64')
+    })
+
+def unit_report(unit_name, games, item_sets, traits, native_traits, top_n=10, min_games=3):
+    """A unit's best item sets and synergy traits from {key: [games, placement sum]} counts"""
+    if games < min_games:
+        print(f"Not enough games to analyze (min required: {min_games})")
+        return {
+            'error': f'Not enough games for {unit_name} (found {games}, need {min_games})',
+            'unit_name': unit_name,
+            'games_found': games
+        }
+
+    # Only show item sets seen in at least 3 games; ties keep the name order groupby used
+    item_stats = placement_frame(item_sets, 'items')
+    item_stats = item_stats[item_stats['count'] >= 3]
+    item_stats = item_stats.sort_values('mean').head(top_n).reset_index(drop=True)
+    top_item_combos = [
+        {'items': row['items'], 'avg_placement': round(row['mean'], 2), 'games': int(row['count'])}
+        for _, row in item_stats.iterrows()
+    ]
+
+    # Native traits come with the unit, so only the other active traits say anything
+    traits = {trait: stats for trait, stats in traits.items() if trait not in native_traits}
+    trait_stats = placement_frame(traits, 'traits').sort_values('mean').head(top_n).reset_index(drop=True)
+    top_traits = [
+        {'trait': row['traits'], 'avg_placement': round(row['mean'], 2), 'games': int(row['count'])}
+        for _, row in trait_stats.iterrows()
+    ]
+
+    return {
+        'unit_name': unit_name,
+        'games_analyzed': games,
+        'item_combinations': top_item_combos,
+        'synergy_traits': top_traits,
+        'native_traits': native_traits
+    }
+
+def pack_item_set(unit, fields, base):
+    """Packed (unit, field, field, field) key for an item set; works on ints or int64 arrays alike.
+
+    fields are the set's item codes + 1 in canonical (name) order, and missing
+    trailing fields are 0, so every 1-3 item set of a unit gets its own key.
+    """
+    key = unit
+    for position in range(ITEM_SLOTS):
+        key = key * base + (fields[position] if position < len(fields) else 0)
+    return key
+
+def unpack_item_set(key, base):
+    """(unit, [item code, ...]) from a key built by pack_item_set"""
+    codes = []
+    for _ in range(ITEM_SLOTS):
+        key, field = divmod(key, base)
+        if field:
+            codes.append(field - 1)
+    return key, codes[::-1]
+
+def most_played(units, limit=10):
+    """[(unit, appearances)] for the most played units; `units` maps unit -> appearances in first-seen order"""
+    # Same construction as value_counts(), so ties break the same way
+    return list(pd.Series(units, dtype='int64').sort_values(ascending=False, kind='stable').head(limit).items())
+
+class ComboStats:
+    """Placement counts and sums for every unit's item sets and board traits, from one pass over a MatchTable.
+
+    Item sets are canonical: a unit's (up to three) items sorted by name,
+    encoded as rank tuples packed into one int64 key per (unit, item set), so
+    every 1-3 item subset of every unit is counted with a single np.unique.
+    Board traits per unit are counted the same way, over packed (unit, trait)
+    keys for every unit/trait pair on a board, so memory follows the number of
+    pairs rather than rows x units. Names are only built for the rows a report
+    actually returns.
+    """
+
+    def __init__(self, table, tft_set=None):
+        table = as_match_table(table)
+        self.table = table
+        placement = table.unit_placement().astype(np.int64)
+        self.unit_counts = np.bincount(table.unit_ids, minlength=len(table.units))
+        self._count_item_sets(table, placement)
+        self._count_traits(table, trait_prefix(tft_set))
+
+    def _count_item_sets(self, table, placement):
+        names = table.items.lookup(np.arange(len(table.items)))
+        missing = len(names)  # rank used for empty slots; sorts after every item
+        # Rank items by name so sorted rank tuples are sorted name tuples
+        self.item_by_rank = np.argsort(names.astype(str), kind='stable')
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[self.item_by_rank] = np.arange(len(names))
+        is_item = np.array([bool(name) for name in names], dtype=bool)
+
+        unit_count = len(table.unit_ids)
+        starts = table.item_offsets[:-1]
+        item_counts = np.diff(table.item_offsets)
+        slots = np.full((unit_count, ITEM_SLOTS), missing, dtype=np.int64)
+        for slot in range(ITEM_SLOTS):
+            has_item = item_counts > slot
+            ids = table.item_ids[starts[has_item] + slot]
+            slots[has_item, slot] = np.where(is_item[ids], rank[ids], missing)
+        slots.sort(axis=1)
+
+        # Every non-empty subset of the sorted slots, as a packed (unit, rank, rank, rank) key
+        self.base = missing + 1
+        keys, weights = [], []
+        for mask in range(1, 2 ** ITEM_SLOTS):
+            chosen = [slot for slot in range(ITEM_SLOTS) if mask >> slot & 1]
+            valid = np.all(slots[:, chosen] < missing, axis=1)
+            fields = [slots[valid, slot] + 1 for slot in chosen]
+            keys.append(pack_item_set(table.unit_ids[valid].astype(np.int64), fields, self.base))
+            weights.append(placement[valid])
+
+        keys = np.concatenate(keys)
+        weights = np.concatenate(weights)
+        self.set_keys, inverse = np.unique(keys, return_inverse=True)
+        self.set_games = np.bincount(inverse, minlength=len(self.set_keys))
+        self.set_placement = np.bincount(inverse, weights=weights, minlength=len(self.set_keys)).astype(np.int64)
+        # set_keys are sorted with the unit as the most significant field
+        self.set_units = self.set_keys // self.base ** ITEM_SLOTS
+
+    def _count_traits(self, table, prefix):
+        # Normalized names (analysis shows traits without the set prefix); two raw
+        # names can collapse into one
+        trait_names = [name.replace(prefix, '') for name in table.traits.names]
+        self.trait_names = list(dict.fromkeys(trait_names))
+        column = {name: index for index, name in enumerate(self.trait_names)}
+        trait_column = np.array([column[name] for name in trait_names], dtype=np.int64)
+
+        # One (unit, trait) pair per unit on a board and trait active on it (CSR cross product)
+        trait_counts = np.diff(table.trait_offsets)
+        unit_rows = np.repeat(np.arange(len(table)), np.diff(table.unit_offsets))
+        pairs_per_unit = trait_counts[unit_rows]
+        pair_unit = np.repeat(np.arange(len(unit_rows)), pairs_per_unit)
+        pair_start = np.repeat(lengths_to_offsets(pairs_per_unit)[:-1], pairs_per_unit)
+        pair_trait = table.trait_offsets[unit_rows][pair_unit] + np.arange(len(pair_unit)) - pair_start
+
+        self.trait_base = max(1, len(self.trait_names))
+        keys = table.unit_ids[pair_unit].astype(np.int64) * self.trait_base + trait_column[table.trait_ids[pair_trait]]
+        weights = table.placement.astype(np.int64)[unit_rows][pair_unit]
+        self.trait_keys, inverse = np.unique(keys, return_inverse=True)
+        self.trait_games = np.bincount(inverse, minlength=len(self.trait_keys))
+        self.trait_placement = np.bincount(inverse, weights=weights, minlength=len(self.trait_keys)).astype(np.int64)
+
+    def games(self, unit_name):
+        unit = self.table.units.ids.get(unit_name)
+        return 0 if unit is None else int(self.unit_counts[unit])
+
+    def item_sets(self, unit_name, min_games=1):
+        """{'Item A | Item B': [games, placement sum]} for one unit's item sets seen at least min_games times"""
+        unit = self.table.units.ids.get(unit_name)
+        if unit is None:
+            return {}
+        start, end = np.searchsorted(self.set_units, [unit, unit + 1])
+        item_sets = {}
+        for index in np.nonzero(self.set_games[start:end] >= min_games)[0] + start:
+            _, ranks = unpack_item_set(int(self.set_keys[index]), self.base)
+            names = self.table.items.lookup(self.item_by_rank[ranks])
+            item_sets[' | '.join(names)] = [int(self.set_games[index]), int(self.set_placement[index])]
+        return item_sets
+
+    def traits(self, unit_name):
+        """{trait: [games, placement sum]} over the boards the unit appeared on"""
+        unit = self.table.units.ids.get(unit_name)
+        if unit is None:
+            return {}
+        start, end = np.searchsorted(self.trait_keys, [unit * self.trait_base, (unit + 1) * self.trait_base])
+        return {
+            self.trait_names[int(self.trait_keys[index] % self.trait_base)]:
+                [int(self.trait_games[index]), int(self.trait_placement[index])]
+            for index in range(start, end)
+        }
+
+    def unit_report(self, unit_name, static_data, top_n=10, min_games=3):
+        return unit_report(unit_name, self.games(unit_name), self.item_sets(unit_name, min_games=3),
+                           self.traits(unit_name), static_data.native_traits(unit_name), top_n, min_games)
+
+    def unit_counts_by_first_seen(self):
+        order = first_seen_order(self.table.unit_ids)
+        return dict(zip(self.table.units.lookup(order), self.unit_counts[order].tolist()))
@@ -0,0 +1,33 @@
+# Production server for main.py:
+#
+#     cd tft_backend && gunicorn -c gunicorn.conf.py main:app
+#
+# Analyses spend most of their time waiting on the Riot API, so each worker
+# serves requests (and SSE streams) on a pool of threads. Background jobs and
+# the result cache live in the worker's memory, and GET /jobs/<id> has to
+# reach the worker that accepted the job, so more than one worker only makes
+# sense behind sticky routing. The SQLite stores (match cache, player history,
+# meta counters) are shared by every worker.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_WORKERS", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "16"))
+# gthread workers only need to check in with the arbiter, so this is not a request time limit
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+# Time a stopping worker gets to finish in-flight requests and background jobs
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "120"))
+keepalive = 5
+accesslog = "-"
+
+def post_worker_init(worker):
+    # Load Community Dragon data before the worker takes its first request
+    from main import warm_up
+    warm_up()
+
+def worker_exit(server, worker):
+    # Open requests are already finished here; let running analysis jobs
+    # finish too, and drop the queued ones, whose results would be lost anyway
+    from jobs import job_queue
+    job_queue.shutdown(wait=True, cancel_pending=True)
@@ -0,0 +1,86 @@
+import os
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+load_dotenv()
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))  # keep-alive connections per host
+# Retries for dropped/refused connections only; status codes (429, 5xx) are left to the callers
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+# HTTP/2 needs httpx[http2]; falls back to requests when it isn't installed
+HTTP2 = os.getenv("HTTP2", "").lower() in ("1", "true", "yes")
+
+class HttpClient:
+    """Pooled keep-alive HTTP client shared by every module that talks to Riot or CDragon.
+
+    Holds one session per host so connections (and TLS handshakes) are reused
+    across requests and threads. Responses and exceptions always look like
+    requests', so callers' status and error handling stay the same when HTTP/2
+    is enabled.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, http2=HTTP2):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.http2 = http2 and httpx is not None
+        if http2 and httpx is None:
+            print("Warning: HTTP2 is set but httpx is not installed, using HTTP/1.1")
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self._httpx_client() if self.http2 else self._requests_session()
+                self.sessions[host] = session
+            return session
+
+    def _requests_session(self):
+        # No read retries: a request that reached Riot counts against the rate limit,
+        # so only the callers (which go through riot_limiters) may send it again
+        retry = Retry(total=self.retries, connect=self.retries, read=0, status=0,
+                      allowed_methods=frozenset(['GET', 'HEAD']), backoff_factor=0.3,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+        return session
+
+    def _httpx_client(self):
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        transport = httpx.HTTPTransport(http2=True, retries=self.retries, limits=limits)
+        return httpx.Client(transport=transport, headers={'Accept-Encoding': 'gzip, deflate'})
+
+    def get(self, url, timeout=15, **kwargs):
+        """GET url over the pooled session for its host; timeout is the read timeout in seconds"""
+        session = self.session(url)
+        if not self.http2:
+            return session.get(url, timeout=(HTTP_CONNECT_TIMEOUT, timeout), **kwargs)
+
+        try:
+            return session.get(url, timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT), **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+http_client = HttpClient()
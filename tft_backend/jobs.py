@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "1800"))
+
+class Job:
+    def __init__(self, key, kind, params):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.progress = {'fetched': 0, 'total': None}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self.done = threading.Event()
+
+    def set_progress(self, fetched, total):
+        self.progress = {'fetched': fetched, 'total': total}
+        self.updated = time.time()
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'analysis_type': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'created': self.created,
+            'updated': self.updated
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = str(self.error)
+        return data
+
+class JobQueue:
+    """Runs analyses on a local worker pool.
+
+    Jobs are deduplicated by key (e.g. (kind, puuid, params)): submitting while an
+    identical job is queued or running returns the existing job, so simultaneous
+    requests for the same player share one fetch-and-analyze run.
+    """
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self.jobs = {}
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, kind, params, fn):
+        """Queue fn(progress) unless an identical job is already pending; returns the Job"""
+        with self.lock:
+            self._prune()
+            job = self.active.get(key)
+            if job is not None:
+                return job
+            job = Job(key, kind, params)
+            self.jobs[job.id] = job
+            self.active[key] = job
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, fn):
+        job.status = 'running'
+        job.updated = time.time()
+        try:
+            job.result = fn(job.set_progress)
+            job.status = 'done'
+        except Exception as e:
+            job.error = e
+            job.status = 'failed'
+        finally:
+            job.updated = time.time()
+            with self.lock:
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+            job.done.set()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done.is_set() and job.updated < cutoff]:
+            del self.jobs[job_id]
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop taking jobs; with wait, block until running jobs finish (queued ones too unless cancel_pending)"""
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+job_queue = JobQueue(ANALYSIS_WORKERS)
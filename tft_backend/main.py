@@ -1,66 +1,101 @@
+import contextvars
+import json
 import os
-import requests
-from flask import Flask, request, jsonify
+import queue
+import threading
+import time
+from flask import Flask, Response, abort, g, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from trait_analysis import run_analysis as run_trait_analysis
 from item_analysis import run_analysis as run_item_analysis
 from unit_analysis import run_analysis as run_units_analysis
+from match_data import configured_set, stored_match_table, sync_player_history
+from result_cache import cached_analysis, cached_stored_analysis
+from static_data import get_static_data
+from riot_account import get_puuid_from_riot_id
+from regions import REGIONS, remember_region, resolve_region
+from jobs import job_queue
+from metrics import Timings, current_timings, http_request_seconds, http_requests, registry, stage
+from profiling import PROFILE_DIR, PROFILE_MODE, ProfileRun, profile_call, profiling_requested
+from meta_crawl import META_KINDS, META_MIN_GAMES, meta_store, meta_table
+from association_rules import (RULE_KINDS, RULES_MAX_LEN, RULES_MAX_LEN_LIMIT, RULES_MIN_CONFIDENCE,
+                               RULES_MIN_SUPPORT, run_analysis as run_rules_analysis)
 from dotenv import load_dotenv
 
 load_dotenv()
 API_KEY = os.getenv("RIOT_API_KEY")
-MASS_REGION = "americas"
+# Provisional results are streamed after every this many newly fetched matches
+STREAM_PARTIAL_EVERY = int(os.getenv("STREAM_PARTIAL_EVERY", "10"))
 
-# Import and override the TFT_SET from analysis modules
 import trait_analysis as trait_analysis
 import item_analysis as item_analysis
 import unit_analysis as unit_analysis
-trait_analysis.TFT_SET = 14  # Force Set 14
-item_analysis.TFT_SET = 14   # Force Set 14
-unit_analysis.TFT_SET = 14   # Force Set 14
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def response(self, *args, **kwargs):
+        with stage('serialization'):
+            return super().response(*args, **kwargs)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app)
 
-def get_puuid_from_riot_id(game_name, tag_line):
-    if not API_KEY:
-        raise Exception("RIOT_API_KEY not found in environment variables")
-    
-    url = f"https://{MASS_REGION}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}?api_key={API_KEY}"
-    print(f"Getting PUUID for {game_name}#{tag_line}...")
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    # ?timings=1 adds this request's per-stage breakdown to its JSON response
+    if request.args.get('timings', '').lower() in ('1', 'true', 'yes'):
+        g.timings_token = current_timings.set(Timings())
+    # ?profile=1 (with PROFILE_MODE=request, or always with PROFILE_MODE=all) profiles analysis routes
+    if PROFILE_MODE != 'off' and _is_profiled_route() and profiling_requested(request.args.get('profile')):
+        run = ProfileRun(request.endpoint)
+        g.profile_run = run if run.start() else None
+
+@app.after_request
+def finish_request_metrics(response):
+    profile = _stop_request_profile()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_requests.inc(route=route, status=response.status_code)
+    http_request_seconds.observe(time.perf_counter() - g.request_started, route=route)
     
-    try:
-        resp = requests.get(url, timeout=15)
-        print(f"Riot ID response: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            puuid = data.get('puuid')
-            if puuid:
-                print(f"Found PUUID: {puuid[:8]}...")
-                return puuid
-            else:
-                raise Exception("PUUID not found in response")
-        elif resp.status_code == 404:
-            raise Exception("Riot ID not found - check your game name and tag line")
-        elif resp.status_code == 401:
-            raise Exception("Invalid API key")
-        elif resp.status_code == 429:
-            raise Exception("Rate limited - please try again in a few minutes")
-        else:
-            raise Exception(f"API error: {resp.status_code}")
-        
-    except requests.exceptions.Timeout:
-        raise Exception("Request timed out - API may be slow, try again")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Network error: {str(e)}")
+    extra = {}
+    timings = current_timings.get()
+    if timings is not None:
+        extra['timings'] = timings.to_dict()
+    if 'profile_run' in g:
+        extra['profile'] = profile or {'skipped': 'Another request is being profiled'}
+    if extra and response.is_json and not response.is_streamed:
+        data = response.get_json()
+        if isinstance(data, dict):
+            data.update(extra)
+            response.set_data(app.json.response(data).get_data())
+    return response
+
+@app.teardown_request
+def reset_request_timings(exc):
+    # Worker threads are reused, so the breakdown must not leak into the next request
+    token = g.pop('timings_token', None)
+    if token is not None:
+        current_timings.reset(token)
+    # A request that failed before after_request still has to release the profiler
+    _stop_request_profile()
 
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profiles/<path:name>')
+def get_profile(name):
+    if PROFILE_MODE == 'off':
+        abort(404)
+    return send_from_directory(PROFILE_DIR, name)
 
 @app.route('/')
 def health_check():
     return jsonify({
-        "status": "TFT Analysis API is running - Set 14",
-        "tft_set": trait_analysis.TFT_SET,
+        "status": f"TFT Analysis API is running - Set {configured_set()}",
+        "tft_set": configured_set(),
         "api_key_configured": bool(API_KEY),
         "endpoints": {
             "traits_by_puuid": "/analyze-traits?puuid=YOUR_PUUID",
@@ -69,10 +104,160 @@ def health_check():
             "items_by_riot_id": "/analyze-items-riot-id?gameName=GAME_NAME&tagLine=TAG_LINE",
             "units_by_puuid": "/analyze-units?puuid=YOUR_PUUID",
             "units_by_riot_id": "/analyze-units-riot-id?gameName=GAME_NAME&tagLine=TAG_LINE",
-            "combined_analysis": "/analyze-all-riot-id?gameName=GAME_NAME&tagLine=TAG_LINE"
-        }
+            "rules_by_puuid": "/analyze-rules?puuid=YOUR_PUUID&kind=traits|units|all",
+            "rules_by_riot_id": "/analyze-rules-riot-id?gameName=GAME_NAME&tagLine=TAG_LINE&kind=traits|units|all&min_support=S&max_len=N",
+            "combined_analysis": "/analyze-all-riot-id?gameName=GAME_NAME&tagLine=TAG_LINE",
+            "combined_analysis_stream": "/analyze-all-riot-id/stream?gameName=GAME_NAME&tagLine=TAG_LINE",
+            "submit_job": "POST /jobs?analysis=all|traits|items|units&gameName=GAME_NAME&tagLine=TAG_LINE",
+            "job_status": "/jobs/JOB_ID",
+            "meta": "/meta?kind=traits|items|units|unit_items&set=SET&min_games=N&limit=N",
+            "metrics": "/metrics"
+        },
+        "timings": "Add timings=1 to any JSON route for a per-stage timing breakdown",
+        "profiling": f"Add profile=1 to an analysis route or POST /jobs for a CPU and allocation profile "
+                     f"(PROFILE_MODE={PROFILE_MODE}; off unless set to request or all)",
+        "regions": "Add region=americas|europe|asia|sea (or a platform such as euw1) to any analysis route; "
+                   "defaults to the player's known region"
     })
 
+# SHARED ANALYSIS RUNNERS
+def run_combined_analysis(puuid, progress=None):
+    """Fetch a player's matches once and run all three analyses over them"""
+    # Fetch the match history once and share it across all three analyses;
+    # repeat requests with no new matches are served from the result cache
+    return cached_analysis(puuid, configured_set(), 'all', _combined_params(),
+                           analyze_match_table, progress)
+
+def analyze_match_table(match_table):
+    """Run the trait, item and unit analyses over one MatchTable; a failing analysis doesn't stop the others"""
+    traits_success = True
+    items_success = True
+    units_success = True
+    
+    try:
+        print("Running traits analysis...")
+        top_traits, bottom_traits = trait_analysis.analyze_traits(match_table)
+        print(f"Traits analysis completed - {len(top_traits)} top traits")
+    except Exception as e:
+        print(f"Traits analysis failed: {e}")
+        top_traits, bottom_traits = [], []
+        traits_success = False
+    
+    try:
+        print("Running items analysis...")
+        top_items, bottom_items = item_analysis.analyze_items(match_table)
+        print(f"Items analysis completed - {len(top_items)} top items")
+    except Exception as e:
+        print(f"Items analysis failed: {e}")
+        top_items, bottom_items = [], []
+        items_success = False
+        
+    try:
+        print("Running units analysis...")
+        units_results = unit_analysis.analyze_units(match_table)
+        print(f"Units analysis completed - {len(units_results.get('top_units', []))} units analyzed")
+    except Exception as e:
+        print(f"Units analysis failed: {e}")
+        units_results = {'top_units': []}
+        units_success = False
+    
+    return {
+        'traits': {
+            'top_traits': top_traits,
+            'bottom_traits': bottom_traits,
+            'success': traits_success
+        },
+        'items': {
+            'top_items': top_items,
+            'bottom_items': bottom_items,
+            'success': items_success
+        },
+        'units': {
+            **units_results,
+            'success': units_success
+        },
+        'tft_set': configured_set(),
+        'analyses_completed': {
+            'traits': traits_success,
+            'items': items_success,
+            'units': units_success
+        }
+    }
+
+def run_single_analysis(analysis_type, puuid, unit_name=None, progress=None):
+    """Run one of the trait/item/unit analyses, returning the same fields as its route"""
+    if analysis_type == 'traits':
+        top, bot = run_trait_analysis(puuid, progress)
+        return {'top_traits': top, 'bottom_traits': bot, 'tft_set': configured_set()}
+    elif analysis_type == 'items':
+        top, bot = run_item_analysis(puuid, progress)
+        return {'top_items': top, 'bottom_items': bot, 'tft_set': configured_set()}
+    else:
+        return {**run_units_analysis(puuid, unit_name, progress), 'tft_set': configured_set()}
+
+# BACKGROUND JOBS
+ANALYSIS_TYPES = ('all', 'traits', 'items', 'units')
+
+@app.route('/jobs', methods=['POST'])
+def submit_analysis_job():
+    params = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    analysis_type = params.get('analysis', 'all')
+    game_name = (params.get('gameName') or '').strip()
+    tag_line = (params.get('tagLine') or '').strip()
+    puuid = (params.get('puuid') or '').strip()
+    unit_name = params.get('unit') if analysis_type == 'units' else None
+    
+    if analysis_type not in ANALYSIS_TYPES:
+        return jsonify({'error': f"analysis must be one of: {', '.join(ANALYSIS_TYPES)}"}), 400
+    if not puuid and not (game_name and tag_line):
+        return jsonify({'error': 'Provide either puuid or both gameName and tagLine'}), 400
+    
+    try:
+        region = resolve_region(params.get('region'))
+        if not puuid:
+            puuid = get_puuid_from_riot_id(game_name, tag_line, region)
+        else:
+            remember_region(puuid, region)
+    except Exception as e:
+        return _handle_analysis_error(e, analysis_type)
+    
+    if analysis_type == 'all':
+        run = lambda progress: run_combined_analysis(puuid, progress)
+    else:
+        run = lambda progress: run_single_analysis(analysis_type, puuid, unit_name, progress)
+    
+    details = {'puuid': puuid[:8] + '...'}
+    if game_name and tag_line:
+        details['riot_id'] = f"{game_name}#{tag_line}"
+    
+    if PROFILE_MODE != 'off' and profiling_requested(params.get('profile')):
+        # The job runs on a queue thread, so profile it there rather than this request
+        unprofiled = run
+        def run(progress):
+            result, profile = profile_call(f"job-{analysis_type}", unprofiled, progress)
+            return {**result, 'profile': profile or {'skipped': 'Another request is being profiled'}}
+    
+    # Simultaneous requests for the same player and analysis share one job
+    job = job_queue.submit((analysis_type, puuid, unit_name), analysis_type, details,
+                           lambda progress: {**_require_success(run(progress)), **details})
+    
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f"/jobs/{job.id}"
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def get_analysis_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    data = job.to_dict()
+    if job.status == 'failed':
+        data['error'], data['error_status'] = _classify_error(job.error, job.kind)
+    return jsonify(data), 200
+
 # COMBINED ANALYSIS (NEW - RECOMMENDED)
 @app.route('/analyze-all-riot-id')
 def analyze_all_by_riot_id():
@@ -92,78 +277,117 @@ def analyze_all_by_riot_id():
         print(f"Starting combined analysis for Riot ID: {game_name}#{tag_line}")
         
         # Get PUUID once
-        puuid = get_puuid_from_riot_id(game_name, tag_line)
+        puuid = get_puuid_from_riot_id(game_name, tag_line, _request_region())
         
-        # Run all three analyses (they'll share the same match data fetching)
-        traits_success = True
-        items_success = True
-        units_success = True
-        
-        try:
-            print("Running traits analysis...")
-            top_traits, bottom_traits = run_trait_analysis(puuid)
-            print(f"Traits analysis completed - {len(top_traits)} top traits")
-        except Exception as e:
-            print(f"Traits analysis failed: {e}")
-            top_traits, bottom_traits = [], []
-            traits_success = False
-        
-        try:
-            print("Running items analysis...")
-            top_items, bottom_items = run_item_analysis(puuid)
-            print(f"Items analysis completed - {len(top_items)} top items")
-        except Exception as e:
-            print(f"Items analysis failed: {e}")
-            top_items, bottom_items = [], []
-            items_success = False
-            
-        try:
-            print("Running units analysis...")
-            units_results = run_units_analysis(puuid)
-            print(f"Units analysis completed - {len(units_results.get('top_units', []))} units analyzed")
-        except Exception as e:
-            print(f"Units analysis failed: {e}")
-            units_results = {'top_units': []}
-            units_success = False
+        combined = run_combined_analysis(puuid)
         
         # Check if at least one analysis succeeded
-        if not (traits_success or items_success or units_success):
+        if not any(combined['analyses_completed'].values()):
             return jsonify({'error': 'All analyses failed. Please try again later.'}), 500
         
         # Return combined results
         result = {
-            'traits': {
-                'top_traits': top_traits,
-                'bottom_traits': bottom_traits,
-                'success': traits_success
-            },
-            'items': {
-                'top_items': top_items,
-                'bottom_items': bottom_items,
-                'success': items_success
-            },
-            'units': {
-                **units_results,
-                'success': units_success
-            },
+            **combined,
             'riot_id': f"{game_name}#{tag_line}",
             'puuid': puuid[:8] + '...',
-            'tft_set': trait_analysis.TFT_SET,
-            'message': 'Combined analysis completed',
-            'analyses_completed': {
-                'traits': traits_success,
-                'items': items_success,
-                'units': units_success
-            }
+            'message': 'Combined analysis completed'
         }
         
         print(f"Combined analysis completed for {game_name}#{tag_line}")
-        print(f"Success: Traits={traits_success}, Items={items_success}, Units={units_success}")
+        print(f"Success: {combined['analyses_completed']}")
         return jsonify(result), 200
         
     except Exception as e:
         return _handle_analysis_error(e, "combined")
 
+@app.route('/analyze-all-riot-id/stream')
+def stream_all_by_riot_id():
+    """Combined analysis as Server-Sent Events.
+
+    Events: 'progress' ({fetched, total}) after each batch of new matches,
+    'partial' (same shape as /analyze-all-riot-id, marked provisional) every
+    STREAM_PARTIAL_EVERY matches, then a single 'result' or 'analysis-error'.
+    A player synced within SYNC_FRESH_SECONDS, or whose sync another request is
+    already running, gets no progress events, just the result.
+    """
+    game_name = (request.args.get('gameName') or '').strip()
+    tag_line = (request.args.get('tagLine') or '').strip()
+    
+    region = request.args.get('region')
+    
+    if not game_name or not tag_line:
+        return jsonify({'error': 'Both gameName and tagLine parameters are required'}), 400
+    
+    def generate():
+        try:
+            print(f"Starting streamed combined analysis for Riot ID: {game_name}#{tag_line}")
+            puuid = get_puuid_from_riot_id(game_name, tag_line, resolve_region(region))
+            details = {'riot_id': f"{game_name}#{tag_line}", 'puuid': puuid[:8] + '...'}
+            
+            # The sync runs on its own thread, through the same single-flight and
+            # freshness check as the other routes, and reports each stored batch here
+            events = queue.Queue()
+            def sync():
+                try:
+                    sync_player_history(puuid, on_batch=lambda fetched, total: events.put((fetched, total)),
+                                        batch_size=STREAM_PARTIAL_EVERY)
+                    events.put(None)
+                except Exception as e:
+                    events.put(e)
+            threading.Thread(target=contextvars.copy_context().run, args=(sync,), daemon=True).start()
+            
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                fetched, total = event
+                yield _sse('progress', {'fetched': fetched, 'total': total})
+                
+                # Returning players get results from their stored history straight away
+                if fetched < total:
+                    partial = _partial_results(puuid, details, fetched, total)
+                    if partial is not None:
+                        yield _sse('partial', partial)
+            
+            combined = _require_success(cached_stored_analysis(puuid, configured_set(), 'all',
+                                                               _combined_params(), analyze_match_table))
+            yield _sse('result', {**combined, **details, 'message': 'Combined analysis completed'})
+            print(f"Streamed combined analysis completed for {game_name}#{tag_line}")
+            
+        except Exception as e:
+            print(f"Combined analysis failed: {str(e)}")
+            message, status = _classify_error(e, "combined")
+            yield _sse('analysis-error', {'error': message, 'status': status})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# SET-WIDE META (precomputed by meta_crawl.py)
+@app.route('/meta')
+def meta_stats():
+    kind = request.args.get('kind', 'traits')
+    tft_set = request.args.get('set', default=configured_set(), type=int)
+    min_games = request.args.get('min_games', default=META_MIN_GAMES, type=int)
+    limit = request.args.get('limit', default=10, type=int)
+    
+    if kind not in META_KINDS:
+        return jsonify({'error': f"kind must be one of: {', '.join(META_KINDS)}"}), 400
+    
+    try:
+        top, bottom = meta_table(tft_set, kind, min_games, limit)
+        return jsonify({
+            'kind': kind,
+            'tft_set': tft_set,
+            'min_games': min_games,
+            'top': top,
+            'bottom': bottom,
+            'crawl': meta_store.stats(tft_set)
+        }), 200
+    except Exception as e:
+        return _handle_analysis_error(e, "meta")
+
 # TRAIT ANALYSIS
 @app.route('/analyze-traits-riot-id')
 def analyze_traits_by_riot_id():
@@ -180,10 +404,10 @@ def analyze_traits_by_riot_id():
         if not game_name or not tag_line:
             return jsonify({'error': 'Game name and tag line cannot be empty'}), 400
         
-        print(f"Starting Set {trait_analysis.TFT_SET} trait analysis for Riot ID: {game_name}#{tag_line}")
+        print(f"Starting Set {configured_set()} trait analysis for Riot ID: {game_name}#{tag_line}")
         
         # First, get the PUUID from Riot ID
-        puuid = get_puuid_from_riot_id(game_name, tag_line)
+        puuid = get_puuid_from_riot_id(game_name, tag_line, _request_region())
         
         # Then run the trait analysis with the PUUID
         top_traits, bottom_traits = run_trait_analysis(puuid)
@@ -194,12 +418,12 @@ def analyze_traits_by_riot_id():
             'bottom_traits': bottom_traits,
             'riot_id': f"{game_name}#{tag_line}",
             'puuid': puuid[:8] + '...',
-            'tft_set': trait_analysis.TFT_SET,
+            'tft_set': configured_set(),
             'analysis_type': 'traits',
-            'message': f'Set {trait_analysis.TFT_SET} trait analysis completed successfully'
+            'message': f'Set {configured_set()} trait analysis completed successfully'
         }
         
-        print(f"Set {trait_analysis.TFT_SET} trait analysis completed successfully for {game_name}#{tag_line}")
+        print(f"Set {configured_set()} trait analysis completed successfully for {game_name}#{tag_line}")
         return jsonify(result), 200
         
     except Exception as e:
@@ -212,14 +436,15 @@ def analyze_traits():
         return jsonify({"error": "Missing PUUID"}), 400
     
     try:
+        remember_region(puuid, _request_region())
         top, bot = run_trait_analysis(puuid)
         return jsonify({
             "top_traits": top,
             "bottom_traits": bot,
             "puuid": puuid[:8] + '...',
-            "tft_set": trait_analysis.TFT_SET,
+            "tft_set": configured_set(),
             "analysis_type": "traits",
-            "message": f"Set {trait_analysis.TFT_SET} trait analysis completed successfully"
+            "message": f"Set {configured_set()} trait analysis completed successfully"
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -240,10 +465,10 @@ def analyze_items_by_riot_id():
         if not game_name or not tag_line:
             return jsonify({'error': 'Game name and tag line cannot be empty'}), 400
         
-        print(f"Starting Set {item_analysis.TFT_SET} item analysis for Riot ID: {game_name}#{tag_line}")
+        print(f"Starting Set {configured_set()} item analysis for Riot ID: {game_name}#{tag_line}")
         
         # First, get the PUUID from Riot ID
-        puuid = get_puuid_from_riot_id(game_name, tag_line)
+        puuid = get_puuid_from_riot_id(game_name, tag_line, _request_region())
         
         # Then run the item analysis with the PUUID
         top_items, bottom_items = run_item_analysis(puuid)
@@ -254,12 +479,12 @@ def analyze_items_by_riot_id():
             'bottom_items': bottom_items,
             'riot_id': f"{game_name}#{tag_line}",
             'puuid': puuid[:8] + '...',
-            'tft_set': item_analysis.TFT_SET,
+            'tft_set': configured_set(),
             'analysis_type': 'items',
-            'message': f'Set {item_analysis.TFT_SET} item analysis completed successfully'
+            'message': f'Set {configured_set()} item analysis completed successfully'
         }
         
-        print(f"Set {item_analysis.TFT_SET} item analysis completed successfully for {game_name}#{tag_line}")
+        print(f"Set {configured_set()} item analysis completed successfully for {game_name}#{tag_line}")
         return jsonify(result), 200
         
     except Exception as e:
@@ -272,14 +497,15 @@ def analyze_items():
         return jsonify({"error": "Missing PUUID"}), 400
     
     try:
+        remember_region(puuid, _request_region())
         top, bot = run_item_analysis(puuid)
         return jsonify({
             "top_items": top,
             "bottom_items": bot,
             "puuid": puuid[:8] + '...',
-            "tft_set": item_analysis.TFT_SET,
+            "tft_set": configured_set(),
             "analysis_type": "items",
-            "message": f"Set {item_analysis.TFT_SET} item analysis completed successfully"
+            "message": f"Set {configured_set()} item analysis completed successfully"
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -301,10 +527,10 @@ def analyze_units_by_riot_id():
         if not game_name or not tag_line:
             return jsonify({'error': 'Game name and tag line cannot be empty'}), 400
         
-        print(f"Starting Set {unit_analysis.TFT_SET} units analysis for Riot ID: {game_name}#{tag_line}")
+        print(f"Starting Set {configured_set()} units analysis for Riot ID: {game_name}#{tag_line}")
         
         # First, get the PUUID from Riot ID
-        puuid = get_puuid_from_riot_id(game_name, tag_line)
+        puuid = get_puuid_from_riot_id(game_name, tag_line, _request_region())
         
         # Then run the units analysis with the PUUID
         results = run_units_analysis(puuid, unit_name)
@@ -314,12 +540,12 @@ def analyze_units_by_riot_id():
             **results,
             'riot_id': f"{game_name}#{tag_line}",
             'puuid': puuid[:8] + '...',
-            'tft_set': unit_analysis.TFT_SET,
+            'tft_set': configured_set(),
             'analysis_type': 'units',
-            'message': f'Set {unit_analysis.TFT_SET} units analysis completed successfully'
+            'message': f'Set {configured_set()} units analysis completed successfully'
         }
         
-        print(f"Set {unit_analysis.TFT_SET} units analysis completed successfully for {game_name}#{tag_line}")
+        print(f"Set {configured_set()} units analysis completed successfully for {game_name}#{tag_line}")
         return jsonify(result), 200
         
     except Exception as e:
@@ -334,13 +560,77 @@ def analyze_units():
         return jsonify({"error": "Missing PUUID"}), 400
     
     try:
+        remember_region(puuid, _request_region())
         results = run_units_analysis(puuid, unit_name)
         return jsonify({
             **results,
             "puuid": puuid[:8] + '...',
-            "tft_set": unit_analysis.TFT_SET,
+            "tft_set": configured_set(),
             "analysis_type": "units",
-            "message": f"Set {unit_analysis.TFT_SET} units analysis completed successfully"
+            "message": f"Set {configured_set()} units analysis completed successfully"
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ASSOCIATION RULES
+@app.route('/analyze-rules-riot-id')
+def analyze_rules_by_riot_id():
+    try:
+        game_name = request.args.get('gameName')
+        tag_line = request.args.get('tagLine')
+        
+        if not game_name or not tag_line:
+            return jsonify({'error': 'Both gameName and tagLine parameters are required'}), 400
+        
+        game_name = game_name.strip()
+        tag_line = tag_line.strip()
+        
+        if not game_name or not tag_line:
+            return jsonify({'error': 'Game name and tag line cannot be empty'}), 400
+        
+        params, error = _rule_params()
+        if error:
+            return jsonify({'error': error}), 400
+        
+        print(f"Starting Set {configured_set()} rule mining for Riot ID: {game_name}#{tag_line}")
+        
+        puuid = get_puuid_from_riot_id(game_name, tag_line, _request_region())
+        results = run_rules_analysis(puuid, **params)
+        
+        result = {
+            **results,
+            'riot_id': f"{game_name}#{tag_line}",
+            'puuid': puuid[:8] + '...',
+            'tft_set': configured_set(),
+            'analysis_type': 'rules',
+            'message': f'Set {configured_set()} rule mining completed successfully'
+        }
+        
+        print(f"Set {configured_set()} rule mining completed successfully for {game_name}#{tag_line}")
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return _handle_analysis_error(e, "rules")
+
+@app.route('/analyze-rules')
+def analyze_rules():
+    puuid = request.args.get('puuid')
+    if not puuid:
+        return jsonify({"error": "Missing PUUID"}), 400
+    
+    params, error = _rule_params()
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        remember_region(puuid, _request_region())
+        results = run_rules_analysis(puuid, **params)
+        return jsonify({
+            **results,
+            "puuid": puuid[:8] + '...',
+            "tft_set": configured_set(),
+            "analysis_type": "rules",
+            "message": f"Set {configured_set()} rule mining completed successfully"
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -355,23 +645,94 @@ def analyze():
     return analyze_traits()
 
 # HELPER FUNCTIONS
+def warm_up():
+    """Load static data before serving, so the first unit analysis doesn't pay for the download"""
+    static_data = get_static_data()
+    print(f"Static data ready (patch {static_data.patch})")
+
 def _handle_analysis_error(e, analysis_type):
+    print(f"{analysis_type.title()} analysis failed: {str(e)}")
+    message, status = _classify_error(e, analysis_type)
+    return jsonify({'error': message}), status
+
+def _classify_error(e, analysis_type):
     error_message = str(e)
-    print(f"{analysis_type.title()} analysis failed: {error_message}")
     
     # Return appropriate error messages
     if "API key" in error_message:
-        return jsonify({'error': 'API configuration error'}), 500
+        return 'API configuration error', 500
+    elif "Unknown region" in error_message:
+        return f"{error_message} - use one of {', '.join(REGIONS)} or a platform such as euw1", 400
     elif "Riot ID not found" in error_message:
-        return jsonify({'error': 'Riot ID not found - check your game name and tag line'}), 404
+        return 'Riot ID not found - check your game name and tag line', 404
     elif "Rate limited" in error_message:
-        return jsonify({'error': 'Rate limited by Riot API. Please try again in a few minutes.'}), 429
+        return 'Rate limited by Riot API. Please try again in a few minutes.', 429
     elif "Insufficient" in error_message:
-        return jsonify({'error': f'Not enough Set {trait_analysis.TFT_SET} matches found for analysis. Play more ranked games and try again.'}), 400
+        return f'Not enough Set {configured_set()} matches found for analysis. Play more ranked games and try again.', 400
     elif "Network error" in error_message or "timeout" in error_message.lower():
-        return jsonify({'error': 'Network error. Please check your connection and try again.'}), 503
+        return 'Network error. Please check your connection and try again.', 503
+    elif "All analyses failed" in error_message:
+        return 'All analyses failed. Please try again later.', 500
     else:
-        return jsonify({'error': f'{analysis_type.title()} analysis failed: {error_message}'}), 500
+        return f'{analysis_type.title()} analysis failed: {error_message}', 500
+
+def _combined_params():
+    # Unit results depend on the static data patch as well as the matches
+    return (get_static_data().patch,)
+
+def _request_region():
+    # Routing region named by the request (region=europe or a platform such as euw1), or None
+    return resolve_region(request.args.get('region'))
+
+def _rule_params():
+    # Returns (run_rules_analysis keyword arguments, error message or None)
+    params = {
+        'kind': request.args.get('kind', 'traits'),
+        'min_support': request.args.get('min_support', default=RULES_MIN_SUPPORT, type=float),
+        'max_len': request.args.get('max_len', default=RULES_MAX_LEN, type=int),
+        'min_confidence': request.args.get('min_confidence', default=RULES_MIN_CONFIDENCE, type=float),
+        'limit': request.args.get('limit', default=10, type=int)
+    }
+    if params['kind'] not in RULE_KINDS:
+        return params, f"kind must be one of: {', '.join(RULE_KINDS)}"
+    if not 0 < params['min_support'] <= 1:
+        return params, 'min_support must be between 0 and 1'
+    if not 2 <= params['max_len'] <= RULES_MAX_LEN_LIMIT:
+        return params, f'max_len must be between 2 and {RULES_MAX_LEN_LIMIT}'
+    return params, None
+
+def _is_profiled_route():
+    # Analysis routes that answer in one response; streams finish after the request hooks run
+    return request.path.startswith('/analyze') and not request.path.endswith('/stream')
+
+def _stop_request_profile():
+    # Returns the profile description the first time it's called for a profiled request
+    run = g.get('profile_run')
+    return run.stop() if run is not None else None
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _partial_results(puuid, details, fetched, total):
+    # Provisional aggregates over whatever is stored so far; None until there are enough matches
+    try:
+        match_table = stored_match_table(puuid, configured_set())
+    except Exception:
+        return None
+    return {
+        **analyze_match_table(match_table),
+        **details,
+        'provisional': True,
+        'matches_analyzed': len(match_table),
+        'progress': {'fetched': fetched, 'total': total}
+    }
+
+def _require_success(result):
+    # A combined run where every analysis failed counts as a failed job
+    completed = result.get('analyses_completed')
+    if completed is not None and not any(completed.values()):
+        raise Exception("All analyses failed")
+    return result
 
 if __name__ == "__main__":
     # Check configuration on startup
@@ -380,13 +741,21 @@ if __name__ == "__main__":
     else:
         print("✅ Riot API key configured")
     
-    print(f"🚀 Starting TFT Analysis API server... (Set {trait_analysis.TFT_SET})")
+    print(f"🚀 Starting TFT Analysis API server... (Set {configured_set()})")
     print("📍 Health check and endpoints: /")
     print("📊 Combined analysis: /analyze-all-riot-id?gameName=NAME&tagLine=TAG")
+    print("📊 Streamed combined analysis: /analyze-all-riot-id/stream?gameName=NAME&tagLine=TAG")
     print("📊 Trait analysis: /analyze-traits-riot-id?gameName=NAME&tagLine=TAG")
     print("📊 Item analysis: /analyze-items-riot-id?gameName=NAME&tagLine=TAG")
     print("📊 Units analysis: /analyze-units-riot-id?gameName=NAME&tagLine=TAG")
+    print("📊 Association rules: /analyze-rules-riot-id?gameName=NAME&tagLine=TAG&kind=traits")
+    print("📊 Set-wide meta: /meta?kind=traits")
+    print("📈 Prometheus metrics: /metrics")
     
-    # Use PORT environment variable for Render, fallback to 5000
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
+    warm_up()
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
+    try:
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+    finally:
+        job_queue.shutdown(wait=True, cancel_pending=True)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dotenv import load_dotenv
+
+load_dotenv()
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+MATCH_CACHE_PATH = os.getenv("MATCH_CACHE_PATH", os.path.join(CACHE_DIR, "matches.sqlite3"))
+MATCH_CACHE_MAX_MB = float(os.getenv("MATCH_CACHE_MAX_MB", "512"))
+# LRU resolution: a read only refreshes last_access once it's this many seconds old
+MATCH_CACHE_TOUCH_INTERVAL = float(os.getenv("MATCH_CACHE_TOUCH_INTERVAL", "3600"))
+# Refreshed access times are written in batches of this many (or with the next put)
+MATCH_CACHE_TOUCH_BATCH = 256
+
+class MatchCache:
+    """Persistent store of raw match payloads keyed by match ID.
+
+    Finished matches never change, so entries are only removed by size-based
+    eviction (least recently used first) or an explicit prune. Reads don't
+    write: access times are refreshed at most every touch_interval seconds and
+    flushed in batches, and the cache size is kept as a running total.
+    """
+
+    def __init__(self, path, max_bytes, touch_interval=MATCH_CACHE_TOUCH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.lock = threading.Lock()
+        self.conn = None
+        self.total_bytes = 0
+        self.touched = {}  # match_id -> last_access not yet written
+
+    def _connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS matches ("
+                "match_id TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS matches_last_access ON matches (last_access)")
+            self.conn.commit()
+            self._count_bytes()
+        return self.conn
+
+    def _count_bytes(self):
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM matches").fetchone()[0]
+
+    def _flush_touches(self, commit=True):
+        if self.touched:
+            self.conn.executemany("UPDATE matches SET last_access = ? WHERE match_id = ?",
+                                  [(last_access, match_id) for match_id, last_access in self.touched.items()])
+            self.touched.clear()
+            if commit:
+                self.conn.commit()
+
+    def get(self, match_id, touch=True):
+        """Return a cached payload; touch=False skips the LRU update entirely"""
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT payload, last_access FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if touch and now - row[1] >= self.touch_interval and match_id not in self.touched:
+                self.touched[match_id] = now
+                if len(self.touched) >= MATCH_CACHE_TOUCH_BATCH:
+                    self._flush_touches()
+        return json.loads(zlib.decompress(row[0]))
+
+    def match_ids(self):
+        with self.lock:
+            return [row[0] for row in self._connect().execute("SELECT match_id FROM matches ORDER BY match_id")]
+
+    def iter_matches(self, batch_size=500):
+        """Yield (match_id, payload) for every cached match, reading batch_size rows at a time"""
+        last_id = ''
+        while True:
+            with self.lock:
+                rows = self._connect().execute(
+                    "SELECT match_id, payload FROM matches WHERE match_id > ? ORDER BY match_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for match_id, payload in rows:
+                yield match_id, json.loads(zlib.decompress(payload))
+            last_id = rows[-1][0]
+
+    def put(self, match_id, match_data):
+        payload = zlib.compress(json.dumps(match_data, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+            self.touched.pop(match_id, None)
+            self._flush_touches(commit=False)  # goes out with this insert's commit
+            conn.execute(
+                "INSERT OR REPLACE INTO matches (match_id, payload, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (match_id, payload, len(payload), now, now)
+            )
+            conn.commit()
+            self.total_bytes += len(payload) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict(self.max_bytes)
+
+    def _evict(self, max_bytes):
+        conn = self._connect()
+        self._flush_touches()
+        # Other processes write to the same file, so recount before deleting anything
+        self._count_bytes()
+        total = self.total_bytes
+        if total <= max_bytes:
+            return 0
+
+        # Trim to 90% of the budget so we don't evict on every insert once full
+        target = max_bytes * 0.9
+        removed = 0
+        for match_id, size in conn.execute("SELECT match_id, size FROM matches ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM matches WHERE match_id = ?", (match_id,))
+            total -= size
+            removed += 1
+        conn.commit()
+        self.total_bytes = total
+        return removed
+
+    def prune(self, max_bytes=None, older_than_days=None):
+        """Evict down to max_bytes and/or drop entries not read in older_than_days. Returns count removed."""
+        removed = 0
+        with self.lock:
+            conn = self._connect()
+            if older_than_days is not None:
+                self._flush_touches()
+                cutoff = time.time() - older_than_days * 86400
+                removed += conn.execute("DELETE FROM matches WHERE last_access < ?", (cutoff,)).rowcount
+                conn.commit()
+            removed += self._evict(self.max_bytes if max_bytes is None else max_bytes)
+            conn.execute("VACUUM")
+        return removed
+
+    def clear(self):
+        with self.lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM matches")
+            conn.commit()
+            self.touched.clear()
+            self.total_bytes = 0
+            conn.execute("VACUUM")
+
+    def stats(self):
+        with self.lock:
+            conn = self._connect()
+            count, total, oldest, newest = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created), MAX(created) FROM matches"
+            ).fetchone()
+        return {
+            'path': self.path,
+            'matches': count,
+            'size_bytes': total,
+            'max_bytes': int(self.max_bytes),
+            'oldest_entry': oldest,
+            'newest_entry': newest
+        }
+
+match_cache = MatchCache(MATCH_CACHE_PATH, MATCH_CACHE_MAX_MB * 1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the local match cache")
+    parser.add_argument("--path", default=MATCH_CACHE_PATH, help="cache database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show entry count and size")
+    show = sub.add_parser("show", help="print a cached match payload")
+    show.add_argument("match_id")
+    prune = sub.add_parser("prune", help="evict least recently used matches")
+    prune.add_argument("--max-mb", type=float, help="target cache size (defaults to MATCH_CACHE_MAX_MB)")
+    prune.add_argument("--older-than-days", type=float, help="drop matches not read for this many days")
+    sub.add_parser("clear", help="remove every cached match")
+    args = parser.parse_args()
+
+    cache = MatchCache(args.path, MATCH_CACHE_MAX_MB * 1024 * 1024)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Cache: {stats['path']}")
+        print(f"Matches: {stats['matches']}")
+        print(f"Size: {stats['size_bytes'] / 1024 / 1024:.1f} MB / {stats['max_bytes'] / 1024 / 1024:.1f} MB")
+    elif args.command == "show":
+        match_data = cache.get(args.match_id)
+        if match_data is None:
+            print(f"Match {args.match_id} is not cached")
+        else:
+            print(json.dumps(match_data, indent=2))
+    elif args.command == "prune":
+        max_bytes = args.max_mb * 1024 * 1024 if args.max_mb is not None else None
+        removed = cache.prune(max_bytes, args.older_than_days)
+        print(f"Removed {removed} matches")
+    elif args.command == "clear":
+        cache.clear()
+        print("Cache cleared")
+
+if __name__ == "__main__":
+    main()
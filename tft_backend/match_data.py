@@ -0,0 +1,316 @@
+import contextvars
+import os
+import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from http_client import http_client
+from rate_limiter import riot_limiters, retry_after
+from match_cache import match_cache
+from match_history import history_store
+from match_table import MatchTable
+from metrics import cache_requests, count_riot_response, stage, timed
+from regions import DEFAULT_REGION, api_base_url, match_region, player_region
+from single_flight import SingleFlight
+from ttl_cache import TTLCache
+
+load_dotenv()
+API_KEY = os.getenv("RIOT_API_KEY")
+TFT_SET = int(os.getenv("TFT_SET", "14"))  # Set served by the API and the CLIs (Set 14 unless configured)
+MATCH_FETCH_WORKERS = int(os.getenv("MATCH_FETCH_WORKERS", "8"))
+HISTORY_LIMIT = 50  # Number of most recent matches each analysis covers
+MATCH_ID_PAGE_SIZE = 200  # Riot's maximum page size for match IDs
+# Also store the other seven boards of every fetched match, so other players'
+# analyses (and lobby-wide stats) can reuse them without another API call
+INGEST_LOBBIES = os.getenv("INGEST_LOBBIES", "1").lower() in ("1", "true", "yes")
+# A player synced this recently is served from stored history without asking Riot
+# for new match IDs; games finished in the meantime show up after it runs out
+SYNC_FRESH_SECONDS = float(os.getenv("SYNC_FRESH_SECONDS", "60"))
+
+def configured_set(tft_set=None):
+    """tft_set when given, otherwise the configured TFT_SET (looked up at call time)"""
+    return TFT_SET if tft_set is None else tft_set
+
+def trait_prefix(tft_set=None):
+    """Prefix Riot puts on a set's trait names, e.g. 'TFT14_'"""
+    return f'TFT{configured_set(tft_set)}_'
+
+# Different analyses of the same player requested together sync their history once
+sync_flights = SingleFlight()
+recent_syncs = TTLCache(10000, SYNC_FRESH_SECONDS)
+
+@timed('match_ids')
+def get_match_ids(puuid, start=0, count=HISTORY_LIMIT, start_time=None, region=None):
+    if not API_KEY:
+        raise Exception("RIOT_API_KEY not found in environment variables")
+
+    region = region or player_region(puuid)
+    limiter = riot_limiters.get(region)
+    url = f"{api_base_url(region)}/tft/match/v1/matches/by-puuid/{puuid}/ids?start={start}&count={count}&api_key={API_KEY}"
+    if start_time is not None:
+        url += f"&startTime={start_time}"
+    print(f"Requesting match IDs for PUUID: {puuid[:8]}...")
+
+    try:
+        limiter.acquire()
+        resp = http_client.get(url, timeout=15)
+        count_riot_response('match_ids', resp)
+        print(f"Match IDs response: {resp.status_code}")
+
+        if resp.status_code == 200:
+            data = resp.json()
+            print(f"Found {len(data)} matches")
+            return data
+        elif resp.status_code == 401:
+            raise Exception("Invalid API key - check RIOT_API_KEY environment variable")
+        elif resp.status_code == 404:
+            raise Exception("PUUID not found or no matches available")
+        elif resp.status_code == 429:
+            wait_time = retry_after(resp, 15)
+            print(f"Rate limited on match IDs request, waiting {wait_time}s...")
+            limiter.pause(wait_time)
+            limiter.acquire()
+            resp = http_client.get(url, timeout=15)
+            count_riot_response('match_ids', resp)
+            if resp.status_code == 200:
+                return resp.json()
+            else:
+                raise Exception("Rate limited - please try again in a few minutes")
+        else:
+            raise Exception(f"API error: {resp.status_code}")
+
+    except requests.exceptions.Timeout:
+        raise Exception("Request timed out - API may be slow, try again")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Network error: {str(e)}")
+
+def get_match_data(match_id):
+    cached = match_cache.get(match_id)
+    cache_requests.inc(cache='match', result='miss' if cached is None else 'hit')
+    if cached is not None:
+        return cached
+
+    # Matches are served by the region their platform prefix belongs to
+    region = match_region(match_id) or DEFAULT_REGION
+    limiter = riot_limiters.get(region)
+    url = f"{api_base_url(region)}/tft/match/v1/matches/{match_id}?api_key={API_KEY}"
+    max_retries = 3
+
+    for attempt in range(max_retries):
+        try:
+            limiter.acquire()
+            with stage('match_fetch'):
+                resp = http_client.get(url, timeout=20)
+            count_riot_response('match', resp)
+
+            if resp.status_code == 200:
+                data = resp.json()
+                if 'info' not in data or 'participants' not in data.get('info', {}):
+                    print(f"Match {match_id}: Invalid structure")
+                    return None
+
+                match_cache.put(match_id, data)
+                return data  # Return all data, filter by set later
+            elif resp.status_code == 429:
+                wait_time = retry_after(resp, 10)
+                print(f"Match {match_id}: Rate limited, waiting {wait_time}s...")
+                limiter.pause(wait_time)
+            elif resp.status_code == 404:
+                print(f"Match {match_id}: Not found")
+                return None
+            else:
+                print(f"Match {match_id}: Error {resp.status_code}")
+                return None
+
+        except requests.exceptions.Timeout:
+            print(f"Match {match_id}: Timeout")
+            if attempt < max_retries - 1:
+                time.sleep(3)
+        except Exception as e:
+            print(f"Match {match_id}: Exception {str(e)}")
+            return None
+
+    return None
+
+def fetch_matches(match_ids, progress=None):
+    """Download matches concurrently, returning payloads (or None) in match_ids order.
+
+    Throughput is bounded by each region's rate limiter rather than by round-trip latency.
+    progress, if given, is called as progress(fetched, total) as downloads finish.
+    """
+    with ThreadPoolExecutor(max_workers=MATCH_FETCH_WORKERS) as executor:
+        # Each download runs in a copy of the caller's context so it counts toward the caller's timings
+        futures = [executor.submit(contextvars.copy_context().run, get_match_data, match_id) for match_id in match_ids]
+        if progress is not None:
+            progress(0, len(futures))
+            for fetched, _ in enumerate(as_completed(futures), start=1):
+                progress(fetched, len(futures))
+        return [future.result() for future in futures]
+
+def parse_participant(match_data, puuid):
+    """Extract one player's board from a match payload, or None if they aren't in it"""
+    index = None
+    for pos, participant_puuid in enumerate(match_data['metadata']['participants']):
+        if puuid == participant_puuid:
+            index = pos
+            break
+
+    if index is None:
+        return None
+
+    return participant_row(match_data, index)
+
+def participant_row(match_data, index):
+    participant_data = match_data['info']['participants'][index]
+
+    return {
+        'set_number': match_data['info']['tft_set_number'],
+        'placement': participant_data['placement'],
+        'level': participant_data['level'],
+        'traits': [trait['name'] for trait in participant_data['traits']],
+        'units': [unit['character_id'] for unit in participant_data['units']],
+        'items': [item.get('itemNames', []) for item in participant_data['units']]
+    }
+
+def parse_lobby(match_data):
+    """Extract every participant's board from a match payload as [(puuid, row)]"""
+    return [
+        (puuid, participant_row(match_data, index))
+        for index, puuid in enumerate(match_data['metadata']['participants'])
+    ]
+
+def get_new_match_ids(puuid, start_time, limit=HISTORY_LIMIT, region=None):
+    """Page through match IDs played at or after start_time (epoch seconds), newest first"""
+    match_ids = []
+    while len(match_ids) < limit:
+        count = min(MATCH_ID_PAGE_SIZE, limit - len(match_ids))
+        page = get_match_ids(puuid, start=len(match_ids), count=count, start_time=start_time, region=region)
+        match_ids.extend(page)
+        if len(page) < count:
+            break
+    return match_ids
+
+def pending_match_ids(puuid):
+    """Match IDs newer than the player's watermark that aren't in their stored history yet, newest first"""
+    watermark = history_store.watermark(puuid)
+    if watermark is None or watermark[1] is None:
+        match_ids = get_match_ids(puuid)
+    else:
+        # game_datetime is in milliseconds, startTime in seconds
+        match_ids = get_new_match_ids(puuid, watermark[1] // 1000)
+
+    # Matches that failed to download last time sit behind the watermark, so ask for them again
+    retry_ids = [match_id for match_id in history_store.failed_match_ids(puuid) if match_id not in match_ids]
+    match_ids = match_ids + retry_ids
+
+    known = history_store.known_match_ids(puuid, match_ids)
+    new_ids = [match_id for match_id in match_ids if match_id not in known]
+    print(f"Processing {len(new_ids)} new matches ({len(known)} already synced, {len(retry_ids)} retried)...")
+    return new_ids
+
+def store_matches(puuid, match_ids, progress=None):
+    """Fetch and parse match_ids and append them to the player's stored history; returns how many were stored"""
+    entries = []
+    lobby_entries = []
+    failed = []
+    for match_id, match_data in zip(match_ids, fetch_matches(match_ids, progress)):
+        if not match_data:
+            failed.append(match_id)
+            continue
+
+        game_datetime = match_data['info'].get('game_datetime', 0)
+        try:
+            if INGEST_LOBBIES:
+                lobby = parse_lobby(match_data)
+                row = next((row for participant, row in lobby if participant == puuid), None)
+            else:
+                lobby = []
+                row = parse_participant(match_data, puuid)
+        except Exception as e:
+            print(f"Error processing match {match_id}: {str(e)}")
+            continue
+
+        if row is None:
+            print(f"Player not found in match {match_id}")
+            continue
+
+        entries.append((match_id, game_datetime, row))
+        lobby_entries.extend(
+            (participant, match_id, game_datetime, participant_row)
+            for participant, participant_row in lobby if participant != puuid
+        )
+
+    if lobby_entries:
+        history_store.add_lobby_matches(lobby_entries)
+    # Failed downloads stay pending so the next sync retries them
+    failed_ids = set(failed)
+    settled = [match_id for match_id in match_ids if match_id not in failed_ids]
+    # Also marks the player as synced when every new match was already stored from another lobby
+    history_store.add_matches(puuid, entries, settled=settled, failed=failed)
+    return len(entries)
+
+def sync_player_history(puuid, progress=None, on_batch=None, batch_size=10):
+    """Fetch only matches newer than the player's watermark and append them to their stored history.
+
+    Skipped (no API calls) when the player was synced within SYNC_FRESH_SECONDS.
+    With on_batch, new matches are stored in batches of batch_size and
+    on_batch(stored, total) is called before the first and after each one, so the
+    caller can read the partial history while the sync runs. Concurrent callers
+    share one sync; only its leader's callbacks are called.
+    Returns [(match_id, row)] for the newest HISTORY_LIMIT matches, newest first.
+    """
+    def sync():
+        if recent_syncs.get(puuid) is None:
+            new_ids = pending_match_ids(puuid)
+            if on_batch is None:
+                store_matches(puuid, new_ids, progress)
+            else:
+                # Oldest first: each stored batch advances the sync watermark, so a
+                # sync that stops halfway must not leave unfetched matches behind it
+                new_ids = new_ids[::-1]
+                on_batch(0, len(new_ids))
+                for start in range(0, len(new_ids), batch_size):
+                    batch = new_ids[start:start + batch_size]
+                    store_matches(puuid, batch, progress)
+                    on_batch(start + len(batch), len(new_ids))
+            recent_syncs.set(puuid, True)
+        return history_store.recent_matches(puuid, HISTORY_LIMIT)
+
+    return sync_flights.do(puuid, sync)
+
+@timed('build_table')
+def table_from_history(matches, tft_set=None):
+    """Encode [(match_id, row)] from the history store as a MatchTable filtered to tft_set"""
+    tft_set = configured_set(tft_set)
+    if not matches:
+        raise Exception("No match IDs found")
+
+    successful_matches = len(matches)
+
+    if successful_matches < 3:
+        raise Exception(f"Insufficient data - only {successful_matches} valid matches found")
+
+    print(f"Successfully processed {successful_matches} matches")
+
+    # Encode and filter by set
+    table = MatchTable.from_rows(row for _, row in matches)
+    table = table.select(table.set_number == tft_set)
+
+    if len(table) < 3:
+        raise Exception(f"Insufficient Set {tft_set} data - only {len(table)} matches from Set {tft_set}")
+
+    print(f"Found {len(table)} Set {tft_set} matches")
+
+    return table
+
+def stored_match_table(puuid, tft_set=None):
+    """MatchTable of the player's stored history only; makes no API calls"""
+    return table_from_history(history_store.recent_matches(puuid, HISTORY_LIMIT), tft_set)
+
+def build_match_table(puuid, tft_set=None, progress=None):
+    """Return a player's recent matches as a MatchTable filtered to tft_set.
+
+    Only matches newer than the stored history are fetched. The result is shared
+    by the trait, item and unit analyzers, which only read from it.
+    """
+    return table_from_history(sync_player_history(puuid, progress), tft_set)
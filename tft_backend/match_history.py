@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+from match_cache import CACHE_DIR
+
+load_dotenv()
+HISTORY_PATH = os.getenv("HISTORY_PATH", os.path.join(CACHE_DIR, "history.sqlite3"))
+# Syncs that retry a match whose download failed before it's given up on (e.g. a 404)
+MATCH_RETRY_LIMIT = int(os.getenv("MATCH_RETRY_LIMIT", "3"))
+
+class PlayerHistoryStore:
+    """Per-player parsed match rows plus a sync watermark (newest match synced for them).
+
+    Rows hold the same fields as match_data.parse_participant, so the analysis
+    table can be rebuilt from disk and only matches newer than the watermark
+    need to be fetched. Rows harvested from other players' lobbies are stored
+    with synced = 0 and never move the watermark: they are real games for that
+    player, but the matches between them haven't been fetched yet.
+
+    Matches whose download failed are kept in failed_matches and retried by
+    later syncs, since the watermark moves past them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_matches ("
+                "puuid TEXT NOT NULL, match_id TEXT NOT NULL, game_datetime INTEGER NOT NULL, row TEXT NOT NULL, "
+                "synced INTEGER NOT NULL DEFAULT 1, PRIMARY KEY (puuid, match_id))"
+            )
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(player_matches)")}
+            if 'synced' not in columns:
+                self.conn.execute("ALTER TABLE player_matches ADD COLUMN synced INTEGER NOT NULL DEFAULT 1")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS player_matches_recent ON player_matches (puuid, game_datetime)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "puuid TEXT PRIMARY KEY, last_match_id TEXT, last_game_datetime INTEGER, synced_at REAL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS failed_matches ("
+                "puuid TEXT NOT NULL, match_id TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "PRIMARY KEY (puuid, match_id))"
+            )
+            self.conn.commit()
+        return self.conn
+
+    def watermark(self, puuid):
+        """Return (last_match_id, last_game_datetime) for a player, or None if never synced"""
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT last_match_id, last_game_datetime FROM sync_state WHERE puuid = ?", (puuid,)
+            ).fetchone()
+        return row
+
+    def known_match_ids(self, puuid, match_ids):
+        if not match_ids:
+            return set()
+        with self.lock:
+            placeholders = ','.join('?' * len(match_ids))
+            rows = self._connect().execute(
+                f"SELECT match_id FROM player_matches WHERE puuid = ? AND match_id IN ({placeholders})",
+                [puuid, *match_ids]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def failed_match_ids(self, puuid):
+        """Match IDs whose download failed in an earlier sync and that are still worth retrying"""
+        with self.lock:
+            rows = self._connect().execute(
+                "SELECT match_id FROM failed_matches WHERE puuid = ? AND attempts < ? ORDER BY match_id DESC",
+                (puuid, MATCH_RETRY_LIMIT)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def add_matches(self, puuid, entries, settled=(), failed=()):
+        """Store (match_id, game_datetime, row) entries and advance the watermark.
+
+        settled match IDs are done with (stored or permanently skipped) and leave
+        failed_matches; failed ones are recorded there for the next sync to retry.
+        """
+        with self.lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO player_matches (puuid, match_id, game_datetime, row, synced) VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (puuid, match_id) DO UPDATE SET synced = 1",
+                [(puuid, match_id, game_datetime, json.dumps(row)) for match_id, game_datetime, row in entries]
+            )
+            conn.executemany(
+                "DELETE FROM failed_matches WHERE puuid = ? AND match_id = ?",
+                [(puuid, match_id) for match_id in settled]
+            )
+            conn.executemany(
+                "INSERT INTO failed_matches (puuid, match_id, attempts) VALUES (?, ?, 1) "
+                "ON CONFLICT (puuid, match_id) DO UPDATE SET attempts = attempts + 1",
+                [(puuid, match_id) for match_id in failed]
+            )
+            newest = conn.execute(
+                "SELECT match_id, game_datetime FROM player_matches WHERE puuid = ? AND synced = 1 "
+                "ORDER BY game_datetime DESC LIMIT 1", (puuid,)
+            ).fetchone()
+            last_match_id, last_game_datetime = newest if newest else (None, None)
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (puuid, last_match_id, last_game_datetime, synced_at) VALUES (?, ?, ?, ?)",
+                (puuid, last_match_id, last_game_datetime, time.time())
+            )
+            conn.commit()
+
+    def add_lobby_matches(self, entries):
+        """Store (puuid, match_id, game_datetime, row) entries for any players, leaving their watermarks alone"""
+        with self.lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR IGNORE INTO player_matches (puuid, match_id, game_datetime, row, synced) VALUES (?, ?, ?, ?, 0)",
+                [(puuid, match_id, game_datetime, json.dumps(row)) for puuid, match_id, game_datetime, row in entries]
+            )
+            conn.commit()
+
+    def stats(self):
+        with self.lock:
+            conn = self._connect()
+            rows, players, matches = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT puuid), COUNT(DISTINCT match_id) FROM player_matches"
+            ).fetchone()
+            synced = conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+        return {'rows': rows, 'players': players, 'matches': matches, 'synced_players': synced}
+
+    def recent_matches(self, puuid, limit):
+        """Return [(match_id, row)] for the player's newest matches, newest first"""
+        with self.lock:
+            rows = self._connect().execute(
+                "SELECT match_id, row FROM player_matches WHERE puuid = ? ORDER BY game_datetime DESC LIMIT ?",
+                (puuid, limit)
+            ).fetchall()
+        return [(match_id, json.loads(row)) for match_id, row in rows]
+
+history_store = PlayerHistoryStore(HISTORY_PATH)
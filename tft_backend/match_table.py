@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+class Vocabulary:
+    """Interns strings (trait, unit or item API names) to dense integer IDs in first-seen order"""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        self._array = None
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        index = self.ids.get(name)
+        if index is None:
+            index = len(self.names)
+            self.ids[name] = index
+            self.names.append(name)
+            self._array = None
+        return index
+
+    def lookup(self, ids):
+        """Decode an array of IDs back to an object array of names"""
+        if self._array is None or len(self._array) != len(self.names):
+            self._array = np.array(self.names, dtype=object)
+        return self._array[ids]
+
+    def __len__(self):
+        return len(self.names)
+
+def csr_select(offsets, values, row_mask):
+    """Keep the rows of a CSR (offsets, values) pair selected by row_mask"""
+    lengths = np.diff(offsets)
+    keep = np.repeat(row_mask, lengths)
+    new_offsets = np.zeros(int(row_mask.sum()) + 1, dtype=np.int64)
+    np.cumsum(lengths[row_mask], out=new_offsets[1:])
+    return new_offsets, values[keep]
+
+class MatchTable:
+    """Dictionary-encoded match table: one row per (player, match) board.
+
+    Per-board lists are stored CSR-style as flat int32 ID arrays plus int64
+    offsets: traits and units are indexed by row, items by unit. Names live in
+    shared Vocabulary objects so tables built with the same vocabularies can
+    be concatenated or aggregated together.
+    """
+
+    def __init__(self, set_number, placement, level, trait_offsets, trait_ids,
+                 unit_offsets, unit_ids, item_offsets, item_ids, traits, units, items):
+        self.set_number = set_number
+        self.placement = placement
+        self.level = level
+        self.trait_offsets = trait_offsets
+        self.trait_ids = trait_ids
+        self.unit_offsets = unit_offsets
+        self.unit_ids = unit_ids
+        self.item_offsets = item_offsets
+        self.item_ids = item_ids
+        self.traits = traits
+        self.units = units
+        self.items = items
+
+    @classmethod
+    def from_rows(cls, rows, traits=None, units=None, items=None):
+        """Encode parsed rows (dicts shaped like match_data.parse_participant output)"""
+        traits = traits if traits is not None else Vocabulary()
+        units = units if units is not None else Vocabulary()
+        items = items if items is not None else Vocabulary()
+
+        set_number, placement, level = [], [], []
+        trait_lengths, trait_ids = [], []
+        unit_lengths, unit_ids = [], []
+        item_lengths, item_ids = [], []
+
+        for row in rows:
+            set_number.append(row['set_number'])
+            placement.append(row['placement'])
+            level.append(row['level'])
+            trait_lengths.append(len(row['traits']))
+            trait_ids.extend(traits.intern(t) for t in row['traits'])
+            unit_lengths.append(len(row['units']))
+            unit_ids.extend(units.intern(u) for u in row['units'])
+            for unit_items in row['items']:
+                item_lengths.append(len(unit_items))
+                item_ids.extend(items.intern(i) for i in unit_items)
+
+        return cls(
+            np.array(set_number, dtype=np.int16),
+            np.array(placement, dtype=np.int8),
+            np.array(level, dtype=np.int8),
+            lengths_to_offsets(trait_lengths), np.array(trait_ids, dtype=np.int32),
+            lengths_to_offsets(unit_lengths), np.array(unit_ids, dtype=np.int32),
+            lengths_to_offsets(item_lengths), np.array(item_ids, dtype=np.int32),
+            traits, units, items
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """Encode a legacy DataFrame with list-of-strings traits/units/items columns"""
+        return cls.from_rows(df[['set_number', 'placement', 'level', 'traits', 'units', 'items']].to_dict('records'))
+
+    def select(self, row_mask):
+        """Return a new table with only the rows where row_mask is True (vocabularies are shared)"""
+        row_mask = np.asarray(row_mask, dtype=bool)
+        trait_offsets, trait_ids = csr_select(self.trait_offsets, self.trait_ids, row_mask)
+        unit_mask = np.repeat(row_mask, np.diff(self.unit_offsets))
+        unit_offsets, unit_ids = csr_select(self.unit_offsets, self.unit_ids, row_mask)
+        item_offsets, item_ids = csr_select(self.item_offsets, self.item_ids, unit_mask)
+        return MatchTable(
+            self.set_number[row_mask], self.placement[row_mask], self.level[row_mask],
+            trait_offsets, trait_ids, unit_offsets, unit_ids, item_offsets, item_ids,
+            self.traits, self.units, self.items
+        )
+
+    def unit_placement(self):
+        """Placement of the board each unit was on, aligned with unit_ids"""
+        return np.repeat(self.placement, np.diff(self.unit_offsets))
+
+    def item_placement(self):
+        """Placement of the board each item was on, aligned with item_ids"""
+        return np.repeat(self.unit_placement(), np.diff(self.item_offsets))
+
+    def trait_placement(self):
+        """Placement of the board each trait was active on, aligned with trait_ids"""
+        return np.repeat(self.placement, np.diff(self.trait_offsets))
+
+    def trait_lists(self):
+        """Decoded trait names per row, as Python lists"""
+        names = self.traits.lookup(self.trait_ids)
+        return [names[start:end].tolist() for start, end in zip(self.trait_offsets[:-1], self.trait_offsets[1:])]
+
+    def to_frame(self):
+        """Decode back to the legacy DataFrame of list-of-strings columns"""
+        unit_names = self.units.lookup(self.unit_ids)
+        item_names = self.items.lookup(self.item_ids)
+        unit_items = [item_names[start:end].tolist() for start, end in zip(self.item_offsets[:-1], self.item_offsets[1:])]
+        units, items = [], []
+        for start, end in zip(self.unit_offsets[:-1], self.unit_offsets[1:]):
+            units.append(unit_names[start:end].tolist())
+            items.append(unit_items[start:end])
+        return pd.DataFrame({
+            'set_number': self.set_number.astype(np.int64),
+            'placement': self.placement.astype(np.int64),
+            'level': self.level.astype(np.int64),
+            'traits': self.trait_lists(),
+            'units': units,
+            'items': items
+        })
+
+    def nbytes(self):
+        """Bytes used by the encoded arrays (excluding the shared vocabularies)"""
+        return sum(array.nbytes for array in (
+            self.set_number, self.placement, self.level, self.trait_offsets, self.trait_ids,
+            self.unit_offsets, self.unit_ids, self.item_offsets, self.item_ids
+        ))
+
+    def __len__(self):
+        return len(self.placement)
+
+def lengths_to_offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+def as_match_table(data):
+    """Accept either a MatchTable or a legacy list-column DataFrame"""
+    if isinstance(data, MatchTable):
+        return data
+    return MatchTable.from_frame(data)
@@ -0,0 +1,271 @@
+import argparse
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from dotenv import load_dotenv
+from match_cache import CACHE_DIR
+from match_data import configured_set, fetch_matches, get_new_match_ids, parse_lobby
+from regions import DEFAULT_REGION, resolve_region
+from riot_account import get_puuid_from_riot_id
+
+load_dotenv()
+META_PATH = os.getenv("META_PATH", os.path.join(CACHE_DIR, "meta.sqlite3"))
+# Matches fetched and folded into the counters per checkpoint
+META_BATCH_SIZE = int(os.getenv("META_BATCH_SIZE", "50"))
+META_MIN_GAMES = int(os.getenv("META_MIN_GAMES", "50"))
+
+# kind -> labels for the key columns of its output rows
+META_KINDS = {
+    'traits': ('Trait',),
+    'items': ('Item',),
+    'units': ('Unit',),
+    'unit_items': ('Unit', 'Item'),
+}
+
+class MetaStore:
+    """Crawl queue, seen match IDs and set-wide placement counters.
+
+    Counters only grow with the number of distinct traits/items/units, not
+    with the number of matches, and each batch of matches is recorded as
+    crawled in the same transaction that adds its counts, so an interrupted
+    crawl resumes without double counting.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_players ("
+                "tft_set INTEGER NOT NULL, puuid TEXT NOT NULL, done INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (tft_set, puuid))"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS crawled_matches (match_id TEXT PRIMARY KEY, tft_set INTEGER)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta_counts ("
+                "tft_set INTEGER NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, "
+                "games INTEGER NOT NULL, top4 INTEGER NOT NULL, placement_sum INTEGER NOT NULL, "
+                "PRIMARY KEY (tft_set, kind, key))"
+            )
+            self.conn.commit()
+        return self.conn
+
+    def enqueue(self, tft_set, puuids):
+        with self.lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR IGNORE INTO crawl_players (tft_set, puuid) VALUES (?, ?)",
+                             [(tft_set, puuid) for puuid in puuids])
+            conn.commit()
+
+    def next_player(self, tft_set):
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT puuid FROM crawl_players WHERE tft_set = ? AND done = 0 ORDER BY rowid LIMIT 1", (tft_set,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def player_done(self, tft_set, puuid):
+        with self.lock:
+            conn = self._connect()
+            conn.execute("UPDATE crawl_players SET done = 1 WHERE tft_set = ? AND puuid = ?", (tft_set, puuid))
+            conn.commit()
+
+    def unseen_match_ids(self, match_ids):
+        if not match_ids:
+            return []
+        with self.lock:
+            placeholders = ','.join('?' * len(match_ids))
+            seen = {row[0] for row in self._connect().execute(
+                f"SELECT match_id FROM crawled_matches WHERE match_id IN ({placeholders})", match_ids
+            )}
+        return [match_id for match_id in match_ids if match_id not in seen]
+
+    def commit_batch(self, tft_set, matches, counts):
+        """Record [(match_id, set_number)] as crawled and add counts {(kind, key): [games, top4, placement_sum]}"""
+        with self.lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR IGNORE INTO crawled_matches (match_id, tft_set) VALUES (?, ?)", matches)
+            conn.executemany(
+                "INSERT INTO meta_counts (tft_set, kind, key, games, top4, placement_sum) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (tft_set, kind, key) DO UPDATE SET games = games + excluded.games, "
+                "top4 = top4 + excluded.top4, placement_sum = placement_sum + excluded.placement_sum",
+                [(tft_set, kind, key, *values) for (kind, key), values in counts.items()]
+            )
+            conn.commit()
+
+    def counts(self, tft_set, kind, min_games=0):
+        """Return [(key, games, top4, placement_sum)] for one kind, in first-counted order"""
+        with self.lock:
+            return self._connect().execute(
+                "SELECT key, games, top4, placement_sum FROM meta_counts "
+                "WHERE tft_set = ? AND kind = ? AND games >= ? ORDER BY rowid",
+                (tft_set, kind, min_games)
+            ).fetchall()
+
+    def stats(self, tft_set):
+        with self.lock:
+            conn = self._connect()
+            players, done = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(done), 0) FROM crawl_players WHERE tft_set = ?", (tft_set,)
+            ).fetchone()
+            matches = conn.execute("SELECT COUNT(*) FROM crawled_matches WHERE tft_set = ?", (tft_set,)).fetchone()[0]
+        return {'tft_set': tft_set, 'players_queued': players - done, 'players_crawled': done, 'matches': matches}
+
+meta_store = MetaStore(META_PATH)
+
+def count_board(counts, row):
+    """Add one board's placement to every trait, unit, item and unit-item pair on it"""
+    placement = row['placement']
+    top4 = 1 if placement <= 4 else 0
+
+    def add(kind, key):
+        entry = counts[(kind, key)]
+        entry[0] += 1
+        entry[1] += top4
+        entry[2] += placement
+
+    for trait in row['traits']:
+        add('traits', trait)
+    for unit, items in zip(row['units'], row['items']):
+        add('units', unit)
+        for item in items:
+            add('items', item)
+            add('unit_items', f"{unit}|{item}")
+
+def resolve_seed(seed, region=None):
+    """A seed line is either a Riot ID (Name#Tag) or a PUUID"""
+    if '#' in seed:
+        game_name, tag_line = seed.rsplit('#', 1)
+        return get_puuid_from_riot_id(game_name.strip(), tag_line.strip(), region)
+    return seed
+
+def read_seeds(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def crawl(tft_set, seeds=(), matches_per_player=100, max_players=None, expand=False, start_time=None,
+          region=None):
+    """Crawl queued players, folding every board of every new match into the set-wide counters.
+
+    With expand, players met in crawled lobbies are queued too. Match histories
+    are listed from region (each player's known region when None).
+    """
+    puuids = []
+    for seed in seeds:
+        try:
+            puuids.append(resolve_seed(seed, region))
+        except Exception as e:
+            print(f"Skipping seed {seed}: {e}")
+    meta_store.enqueue(tft_set, puuids)
+
+    crawled_players = 0
+    while max_players is None or crawled_players < max_players:
+        puuid = meta_store.next_player(tft_set)
+        if puuid is None:
+            break
+
+        try:
+            match_ids = meta_store.unseen_match_ids(get_new_match_ids(puuid, start_time, matches_per_player, region))
+        except Exception as e:
+            print(f"Could not list matches for {puuid[:8]}: {e}")
+            meta_store.player_done(tft_set, puuid)
+            continue
+        print(f"Player {puuid[:8]}: {len(match_ids)} new matches")
+
+        for start in range(0, len(match_ids), META_BATCH_SIZE):
+            batch = match_ids[start:start + META_BATCH_SIZE]
+            counts = defaultdict(lambda: [0, 0, 0])
+            crawled = []
+            lobby_players = set()
+            for match_id, match_data in zip(batch, fetch_matches(batch)):
+                # Failed downloads aren't marked crawled so a later run retries them
+                if not match_data:
+                    continue
+                set_number = match_data['info'].get('tft_set_number')
+                # Malformed payloads are marked crawled too, so a re-run doesn't stop on them again
+                crawled.append((match_id, set_number))
+                if set_number != tft_set:
+                    continue
+                try:
+                    # Counted separately first so a board failing halfway adds nothing
+                    match_counts = defaultdict(lambda: [0, 0, 0])
+                    lobby = parse_lobby(match_data)
+                    for _, row in lobby:
+                        count_board(match_counts, row)
+                except Exception as e:
+                    print(f"Error processing match {match_id}: {str(e)}")
+                    continue
+                for key, (games, top4, placement_sum) in match_counts.items():
+                    entry = counts[key]
+                    entry[0] += games
+                    entry[1] += top4
+                    entry[2] += placement_sum
+                lobby_players.update(participant for participant, _ in lobby)
+            meta_store.commit_batch(tft_set, crawled, counts)
+            if expand:
+                meta_store.enqueue(tft_set, lobby_players)
+
+        meta_store.player_done(tft_set, puuid)
+        crawled_players += 1
+
+    return meta_store.stats(tft_set)
+
+def meta_table(tft_set, kind, min_games=META_MIN_GAMES, limit=10):
+    """Top and bottom `limit` entries by Top 4 / Bottom 4 rate, in the analyzers' record format"""
+    labels = META_KINDS[kind]
+    records = []
+    for key, games, top4, placement_sum in meta_store.counts(tft_set, kind, min_games):
+        record = dict(zip(labels, key.split('|')))
+        record.update({
+            'Top 4 Rate': top4 / games,
+            'Bottom 4 Rate': (games - top4) / games,
+            'Games Played': games,
+            'Average Placement': placement_sum / games
+        })
+        records.append(record)
+
+    # sorted() is stable, so ties keep first-counted order like the analyzers' sort_values
+    top = sorted(records, key=lambda r: -r['Top 4 Rate'])[:limit]
+    bottom = sorted(records, key=lambda r: -r['Bottom 4 Rate'])[:limit]
+    return top, bottom
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl players' matches and aggregate set-wide meta stats")
+    parser.add_argument("--set", dest="tft_set", type=int, default=configured_set())
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("crawl", help="crawl the queue (plus any seeds); safe to stop and re-run")
+    run.add_argument("seeds", nargs="?", help="file with one Riot ID (Name#Tag) or PUUID per line")
+    run.add_argument("--matches-per-player", type=int, default=100)
+    run.add_argument("--max-players", type=int, help="stop after crawling this many players")
+    run.add_argument("--expand", action="store_true", help="queue every player met in crawled lobbies")
+    run.add_argument("--since", type=int, help="only matches played after this epoch time (seconds)")
+    run.add_argument("--region", type=resolve_region, default=DEFAULT_REGION,
+                     help="routing region (americas/europe/asia/sea) or platform (e.g. euw1) of the players crawled")
+    sub.add_parser("stats", help="show crawl progress")
+    show = sub.add_parser("show", help="print a meta table")
+    show.add_argument("kind", choices=sorted(META_KINDS))
+    show.add_argument("--min-games", type=int, default=META_MIN_GAMES)
+    show.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "crawl":
+        seeds = read_seeds(args.seeds) if args.seeds else []
+        print(crawl(args.tft_set, seeds, args.matches_per_player, args.max_players, args.expand, args.since,
+                    args.region))
+    elif args.command == "stats":
+        print(meta_store.stats(args.tft_set))
+    elif args.command == "show":
+        top, bottom = meta_table(args.tft_set, args.kind, args.min_games, args.limit)
+        for title, records in (("Top 4", top), ("Bottom 4", bottom)):
+            print(f"{title}:")
+            for record in records:
+                print("  " + ", ".join(f"{k}: {round(v, 3) if isinstance(v, float) else v}" for k, v in record.items()))
+
+if __name__ == "__main__":
+    main()
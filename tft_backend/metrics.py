@@ -0,0 +1,161 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# In-process Prometheus-style metrics, rendered in the text exposition format
+# by GET /metrics. Pipeline stages also add to a per-request breakdown when a
+# request opted in (?timings=1).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}  # labels -> [count per bucket, sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (bucket_counts, total, count) in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = format_labels(self.labelnames, key, [('le', bound)])
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    'tft_stage_seconds', 'Time spent in each analysis pipeline stage', ('stage',))
+riot_requests = registry.counter(
+    'tft_riot_requests_total', 'Riot API responses by endpoint and status code', ('endpoint', 'status'))
+riot_rate_limited = registry.counter(
+    'tft_riot_rate_limited_total', '429 responses from the Riot API', ('region',))
+riot_retry_after_seconds = registry.counter(
+    'tft_riot_retry_after_seconds_total', 'Pause imposed by Retry-After headers on 429s', ('region',))
+rate_limit_wait_seconds = registry.counter(
+    'tft_rate_limit_wait_seconds_total', 'Time callers spent blocked in the local rate limiter', ('region',))
+cache_requests = registry.counter(
+    'tft_cache_requests_total', 'Match and result cache lookups', ('cache', 'result'))
+http_requests = registry.counter(
+    'tft_http_requests_total', 'API requests served by route and status code', ('route', 'status'))
+http_request_seconds = registry.histogram(
+    'tft_http_request_seconds', 'API request latency by route', ('route',))
+
+class Timings:
+    """Per-request stage breakdown: {stage: {'calls': n, 'seconds': s}}.
+
+    Seconds are summed over calls, so concurrent match downloads can add up to
+    more than the request's total_seconds.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+
+    def to_dict(self):
+        with self.lock:
+            stages = {stage: {'calls': entry['calls'], 'seconds': round(entry['seconds'], 4)}
+                      for stage, entry in self.stages.items()}
+        return {'total_seconds': round(time.perf_counter() - self.started, 4), 'stages': stages}
+
+# Set while serving a request that asked for timings. Worker threads that should
+# report into it (match downloads) run in a copy of the caller's context.
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+def record(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+def timed(name):
+    """Decorator recording every call of a function as one `name` stage"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count_riot_response(endpoint, resp):
+    riot_requests.inc(endpoint=endpoint, status=resp.status_code)
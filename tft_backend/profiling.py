@@ -0,0 +1,120 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from dotenv import load_dotenv
+from match_cache import CACHE_DIR
+
+load_dotenv()
+# off: never profile (the default; the hooks return straight away)
+# request: profile requests that pass profile=1
+# all: profile every analysis request
+PROFILE_MODE = os.getenv("PROFILE_MODE", "off").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))  # newest profiles kept on disk
+PROFILE_TRACE_FRAMES = int(os.getenv("PROFILE_TRACE_FRAMES", "5"))
+PROFILE_TOP = 30  # rows in the text summaries
+
+# cProfile allows one active profiler per process, so concurrent requests take turns
+_profile_lock = threading.Lock()
+
+def profiling_requested(flag):
+    if PROFILE_MODE == 'all':
+        return True
+    return PROFILE_MODE == 'request' and str(flag or '').lower() in ('1', 'true', 'yes')
+
+class ProfileRun:
+    """CPU profile (cProfile) and allocation snapshot (tracemalloc) of one analysis run.
+
+    Only the thread that starts the run is CPU-profiled, so time spent waiting
+    on match downloads shows up as waits in the executor. Allocations are
+    traced for the whole process.
+    """
+
+    def __init__(self, name):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.profiler = None
+        self.started_tracing = False
+        self.started = None
+
+    def start(self):
+        """Begin profiling; returns False if another run holds the profiler"""
+        if not _profile_lock.acquire(blocking=False):
+            return False
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return True
+
+    def stop(self):
+        """Stop profiling and write the profile files; returns their description (None if never started)"""
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        seconds = time.perf_counter() - self.started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+        profiler, self.profiler = self.profiler, None
+        _profile_lock.release()
+
+        try:
+            return self._write(profiler, snapshot, seconds, peak)
+        except OSError as e:
+            print(f"Could not write profile {self.id}: {e}")
+            return {'id': self.id, 'error': str(e)}
+
+    def _write(self, profiler, snapshot, seconds, peak):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        files = {
+            'summary': f"{self.id}.txt",
+            'cpu': f"{self.id}.prof",              # pstats / snakeviz
+            'allocations': f"{self.id}.tracemalloc"  # tracemalloc.Snapshot.load
+        }
+        profiler.dump_stats(os.path.join(PROFILE_DIR, files['cpu']))
+        snapshot.dump(os.path.join(PROFILE_DIR, files['allocations']))
+
+        cpu = io.StringIO()
+        pstats.Stats(profiler, stream=cpu).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        lines = [f"Profile {self.id}: {seconds:.3f}s wall, peak traced memory {peak / 1024:.0f} KiB", "",
+                 f"Top {PROFILE_TOP} allocation sites:"]
+        lines += [f"  {stat}" for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+        with open(os.path.join(PROFILE_DIR, files['summary']), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + "\n\nCPU profile (cumulative):\n" + cpu.getvalue())
+
+        prune_profiles()
+        print(f"Profile written: {os.path.join(PROFILE_DIR, files['summary'])}")
+        return {
+            'id': self.id,
+            'seconds': round(seconds, 4),
+            'peak_traced_kib': round(peak / 1024, 1),
+            'files': {kind: f"/profiles/{name}" for kind, name in files.items()}
+        }
+
+def profile_call(name, fn, *args):
+    """Run fn(*args) under a ProfileRun; returns (result, profile description or None if busy)"""
+    run = ProfileRun(name)
+    if not run.start():
+        return fn(*args), None
+    try:
+        result = fn(*args)
+    finally:
+        info = run.stop()
+    return result, info
+
+def prune_profiles():
+    # Each run writes three files; keep the newest PROFILE_KEEP runs
+    names = sorted(os.listdir(PROFILE_DIR))
+    runs = sorted({name.rsplit('.', 1)[0] for name in names})
+    stale = set(runs[:-PROFILE_KEEP]) if len(runs) > PROFILE_KEEP else set()
+    for name in names:
+        if name.rsplit('.', 1)[0] in stale:
+            os.remove(os.path.join(PROFILE_DIR, name))
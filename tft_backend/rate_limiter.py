@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import deque
+from metrics import rate_limit_wait_seconds, record, riot_rate_limited, riot_retry_after_seconds
+
+# Riot development keys allow 20 requests/second and 100 requests/2 minutes.
+# Override with e.g. RIOT_RATE_LIMITS="500:10,30000:600" for a production key.
+DEFAULT_RATE_LIMITS = "20:1,100:120"
+
+def parse_rate_limits(spec):
+    """Parse "count:seconds,count:seconds" into a list of (count, seconds) tuples"""
+    limits = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        count, seconds = part.split(':')
+        limits.append((int(count), float(seconds)))
+    return limits
+
+def retry_after(resp, default):
+    """Seconds to wait after a 429, taken from the Retry-After header when present"""
+    try:
+        return float(resp.headers.get('Retry-After', default))
+    except (TypeError, ValueError):
+        return default
+
+class SlidingWindow:
+    """Log of the send times in the last `period` seconds, admitting at most `count` of them"""
+
+    def __init__(self, count, period):
+        self.count = count
+        self.period = period
+        self.sent = deque()
+
+    def wait_time(self, now):
+        """Seconds until a request fits in the window (0 if one fits now)"""
+        while self.sent and self.sent[0] <= now - self.period:
+            self.sent.popleft()
+        if len(self.sent) < self.count:
+            return 0.0
+        return self.sent[0] + self.period - now
+
+    def add(self, now):
+        self.sent.append(now)
+
+class RateLimiter:
+    """Thread-safe limiter enforcing several sliding windows at once (Riot's dual windows).
+
+    A request only goes out once every window has room for it, so no span of
+    `seconds` ever sees more than `count` requests, and a 429's Retry-After
+    pauses all callers through pause().
+    """
+
+    def __init__(self, limits, name='default', clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.windows = [SlidingWindow(count, seconds) for count, seconds in limits]
+        self.blocked_until = 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent, then record it in every window"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                wait = max([self.blocked_until - now] + [w.wait_time(now) for w in self.windows])
+                if wait <= 0:
+                    for window in self.windows:
+                        window.add(now)
+                    break
+            self.sleep(wait)
+            waited += wait
+        if waited:
+            rate_limit_wait_seconds.inc(waited, region=self.name)
+            record('rate_limit_wait', waited)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (used for Retry-After)"""
+        riot_rate_limited.inc(region=self.name)
+        riot_retry_after_seconds.inc(seconds, region=self.name)
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+class LimiterPool:
+    """One RateLimiter per routing region, created on first use.
+
+    Riot counts rate limits separately for each regional host, so traffic (or a
+    429) in one region never holds back requests to another.
+    """
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def get(self, region):
+        with self.lock:
+            limiter = self.limiters.get(region)
+            if limiter is None:
+                limiter = self.limiters[region] = RateLimiter(self.limits, region)
+            return limiter
+
+riot_limiters = LimiterPool(parse_rate_limits(os.getenv("RIOT_RATE_LIMITS", DEFAULT_RATE_LIMITS)))
@@ -0,0 +1,75 @@
+import os
+from dotenv import load_dotenv
+from match_history import history_store
+from ttl_cache import TTLCache
+
+load_dotenv()
+# Routing region for players whose region isn't given by the request or known from their matches
+DEFAULT_REGION = os.getenv("RIOT_REGION", "americas").lower()
+# Override to point every region at a local stand-in (see benchmarks/mock_riot.py)
+RIOT_API_BASE_URL = os.getenv("RIOT_API_BASE_URL")
+PLAYER_REGION_CACHE_SIZE = int(os.getenv("PLAYER_REGION_CACHE_SIZE", "10000"))
+
+REGIONS = ('americas', 'europe', 'asia', 'sea')
+
+# Platform ID (also the match ID prefix, e.g. EUW1_1234) -> match-v1 routing region
+PLATFORM_REGIONS = {
+    'NA1': 'americas', 'BR1': 'americas', 'LA1': 'americas', 'LA2': 'americas',
+    'EUW1': 'europe', 'EUN1': 'europe', 'TR1': 'europe', 'RU': 'europe', 'ME1': 'europe',
+    'KR': 'asia', 'JP1': 'asia',
+    'OC1': 'sea', 'PH2': 'sea', 'SG2': 'sea', 'TH2': 'sea', 'TW2': 'sea', 'VN2': 'sea',
+}
+
+# Short names players and the client use for each platform (EUNE, OCE, ...) -> platform ID
+PLATFORM_ALIASES = {
+    'NA': 'NA1', 'BR': 'BR1', 'LAN': 'LA1', 'LAS': 'LA2',
+    'EUW': 'EUW1', 'EUNE': 'EUN1', 'TR': 'TR1', 'RU': 'RU', 'ME': 'ME1',
+    'KR': 'KR', 'JP': 'JP1',
+    'OCE': 'OC1', 'PH': 'PH2', 'SG': 'SG2', 'TH': 'TH2', 'TW': 'TW2', 'VN': 'VN2',
+}
+
+# account-v1 has no SEA cluster; accounts are global, so another cluster answers for it
+ACCOUNT_REGIONS = {'sea': 'asia'}
+
+# PUUID -> routing region, remembered from requests that named one
+player_regions = TTLCache(PLAYER_REGION_CACHE_SIZE, 24 * 3600)
+
+def resolve_region(name):
+    """Routing region for a region (europe), platform (eun1) or platform short name (eune); None when not given"""
+    if not name or not name.strip():
+        return None
+    name = name.strip()
+    if name.lower() in REGIONS:
+        return name.lower()
+    platform = name.upper()
+    region = PLATFORM_REGIONS.get(PLATFORM_ALIASES.get(platform, platform))
+    if region is None:
+        raise Exception(f"Unknown region: {name}")
+    return region
+
+def match_region(match_id):
+    """Routing region of a match, from its platform prefix; None if the prefix isn't recognized"""
+    platform, _, _ = match_id.partition('_')
+    return PLATFORM_REGIONS.get(platform.upper())
+
+def account_region(region):
+    return ACCOUNT_REGIONS.get(region, region)
+
+def api_base_url(region):
+    return RIOT_API_BASE_URL or f"https://{region}.api.riotgames.com"
+
+def remember_region(puuid, region):
+    if region:
+        player_regions.set(puuid, region)
+
+def player_region(puuid):
+    """A player's routing region: as last requested, else from their stored matches, else DEFAULT_REGION"""
+    region = player_regions.get(puuid)
+    if region is None:
+        # Everyone in a lobby plays on the same platform, so any stored match tells
+        recent = history_store.recent_matches(puuid, 1)
+        region = match_region(recent[0][0]) if recent else None
+        if region is None:
+            return DEFAULT_REGION
+        player_regions.set(puuid, region)
+    return region
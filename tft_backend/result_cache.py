@@ -0,0 +1,57 @@
+import hashlib
+import os
+from dotenv import load_dotenv
+from match_data import HISTORY_LIMIT, sync_player_history, table_from_history
+from match_history import history_store
+from metrics import cache_requests, stage
+from single_flight import SingleFlight
+from ttl_cache import TTLCache
+
+load_dotenv()
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+# Results only change when new matches arrive (which changes the key); the TTL
+# just bounds how long an idle player's results stay in memory
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+
+result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+analysis_flights = SingleFlight()
+
+def match_digest(match_ids):
+    """Stable digest of the match IDs a result was computed from"""
+    return hashlib.sha1('\n'.join(match_ids).encode('utf-8')).hexdigest()
+
+def cached_result(puuid, tft_set, analysis, params, matches, compute):
+    """Return compute(MatchTable) for [(match_id, row)], reusing a previous result over the same matches.
+
+    Keyed on (puuid, tft_set, analysis, params, digest of the match IDs), so a
+    new match for the player changes the key and the stale entry simply ages out.
+    """
+    key = (puuid, tft_set, analysis, params, match_digest([match_id for match_id, _ in matches]))
+    result = result_cache.get(key)
+    cache_requests.inc(cache='result', result='miss' if result is None else 'hit')
+    if result is not None:
+        print(f"Using cached {analysis} result for PUUID: {puuid[:8]}")
+        return result
+
+    table = table_from_history(matches, tft_set)
+    with stage('aggregation'):
+        result = compute(table)
+    result_cache.set(key, result)
+    return result
+
+def cached_analysis(puuid, tft_set, analysis, params, compute, progress=None):
+    """Sync the player's history, then return the cached or freshly computed result.
+
+    The sync costs a match-IDs call to Riot unless the player was synced within
+    SYNC_FRESH_SECONDS, so repeat requests inside that window are pure cache hits.
+    Concurrent calls for the same (puuid, tft_set, analysis, params) share one
+    run; only the first caller's progress callback sees the download.
+    """
+    return analysis_flights.do(
+        (puuid, tft_set, analysis, params),
+        lambda: cached_result(puuid, tft_set, analysis, params, sync_player_history(puuid, progress), compute)
+    )
+
+def cached_stored_analysis(puuid, tft_set, analysis, params, compute):
+    """Like cached_analysis, over the player's stored history without syncing it first"""
+    return cached_result(puuid, tft_set, analysis, params, history_store.recent_matches(puuid, HISTORY_LIMIT), compute)
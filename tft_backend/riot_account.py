@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from match_cache import CACHE_DIR
+from http_client import http_client
+from rate_limiter import riot_limiters, retry_after
+from regions import DEFAULT_REGION, account_region, api_base_url, remember_region
+from single_flight import SingleFlight
+from ttl_cache import TTLCache
+from metrics import count_riot_response, timed
+
+load_dotenv()
+API_KEY = os.getenv("RIOT_API_KEY")
+
+# Riot IDs can be renamed, so resolved PUUIDs are only trusted for a day.
+# Failed lookups are remembered briefly so typos don't burn quota on every retry.
+PUUID_CACHE_TTL = float(os.getenv("PUUID_CACHE_TTL", str(24 * 3600)))
+PUUID_NEGATIVE_TTL = float(os.getenv("PUUID_NEGATIVE_TTL", "300"))
+PUUID_CACHE_SIZE = int(os.getenv("PUUID_CACHE_SIZE", "10000"))
+# Set PUUID_CACHE_PATH="" to keep the cache in memory only
+PUUID_CACHE_PATH = os.getenv("PUUID_CACHE_PATH", os.path.join(CACHE_DIR, "accounts.sqlite3"))
+
+NOT_FOUND_MESSAGE = "Riot ID not found - check your game name and tag line"
+
+class PuuidStore:
+    """Optional on-disk backing for resolved PUUIDs so they survive restarts"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS riot_ids (riot_id TEXT PRIMARY KEY, puuid TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self.conn.commit()
+        return self.conn
+
+    def get(self, riot_id):
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT puuid, expires FROM riot_ids WHERE riot_id = ?", (riot_id,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0], row[1] - time.time()
+
+    def put(self, riot_id, puuid, ttl):
+        with self.lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO riot_ids (riot_id, puuid, expires) VALUES (?, ?, ?)",
+                (riot_id, puuid, time.time() + ttl)
+            )
+            conn.commit()
+
+puuid_cache = TTLCache(PUUID_CACHE_SIZE, PUUID_CACHE_TTL)
+puuid_store = PuuidStore(PUUID_CACHE_PATH) if PUUID_CACHE_PATH else None
+# Simultaneous lookups of the same Riot ID make one account-v1 call
+lookup_flights = SingleFlight()
+
+def riot_id_key(game_name, tag_line):
+    # Riot IDs are case-insensitive
+    return f"{game_name.strip().lower()}#{tag_line.strip().lower()}"
+
+@timed('puuid_lookup')
+def get_puuid_from_riot_id(game_name, tag_line, region=None):
+    """Get PUUID from Riot ID (game name + tag line), served from cache when possible.
+
+    PUUIDs are global, so region only picks the host and is remembered as the
+    player's region for their match history.
+    """
+    key = riot_id_key(game_name, tag_line)
+
+    cached = puuid_cache.get(key)
+    if cached is None and puuid_store is not None:
+        stored = puuid_store.get(key)
+        if stored is not None:
+            cached = stored[0]
+            puuid_cache.set(key, cached, ttl=stored[1])
+
+    if cached is not None:
+        if cached is False:
+            raise Exception(NOT_FOUND_MESSAGE)
+        print(f"Using cached PUUID for {game_name}#{tag_line}: {cached[:8]}...")
+        remember_region(cached, region)
+        return cached
+
+    try:
+        puuid = lookup_flights.do(key, lambda: fetch_puuid(game_name, tag_line, region))
+    except Exception as e:
+        if str(e) == NOT_FOUND_MESSAGE:
+            puuid_cache.set(key, False, ttl=PUUID_NEGATIVE_TTL)
+        raise
+
+    puuid_cache.set(key, puuid)
+    if puuid_store is not None:
+        puuid_store.put(key, puuid, PUUID_CACHE_TTL)
+    remember_region(puuid, region)
+    return puuid
+
+def fetch_puuid(game_name, tag_line, region=None):
+    if not API_KEY:
+        raise Exception("RIOT_API_KEY not found in environment variables")
+
+    region = account_region(region or DEFAULT_REGION)
+    limiter = riot_limiters.get(region)
+    url = f"{api_base_url(region)}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}?api_key={API_KEY}"
+    print(f"Getting PUUID for {game_name}#{tag_line}...")
+
+    try:
+        limiter.acquire()
+        resp = http_client.get(url, timeout=15)
+        count_riot_response('account', resp)
+        print(f"Riot ID response: {resp.status_code}")
+
+        if resp.status_code == 200:
+            data = resp.json()
+            puuid = data.get('puuid')
+            if puuid:
+                print(f"Found PUUID: {puuid[:8]}...")
+                return puuid
+            else:
+                raise Exception("PUUID not found in response")
+        elif resp.status_code == 404:
+            raise Exception(NOT_FOUND_MESSAGE)
+        elif resp.status_code == 401:
+            raise Exception("Invalid API key")
+        elif resp.status_code == 429:
+            limiter.pause(retry_after(resp, 15))
+            raise Exception("Rate limited - please try again in a few minutes")
+        else:
+            raise Exception(f"API error: {resp.status_code}")
+
+    except requests.exceptions.Timeout:
+        raise Exception("Request timed out - API may be slow, try again")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Network error: {str(e)}")
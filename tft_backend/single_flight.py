@@ -0,0 +1,49 @@
+import threading
+
+class Flight:
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.done = threading.Event()
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    Callers arriving while a call for their key is running wait for it and get
+    the same result (or exception) instead of repeating the work, so identical
+    requests that land together cost one round of Riot API calls. Nothing is
+    kept once the call finishes; caching results is left to the caller.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+            if flight.waiters:
+                print(f"Shared one result with {flight.waiters} concurrent identical request(s)")
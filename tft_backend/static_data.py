@@ -0,0 +1,199 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from http_client import http_client
+from match_cache import CACHE_DIR
+
+load_dotenv()
+CDRAGON_BASE_URL = os.getenv("CDRAGON_BASE_URL", "https://raw.communitydragon.org/latest")
+STATIC_DATA_DIR = os.getenv("STATIC_DATA_DIR", os.path.join(CACHE_DIR, "static"))
+# How often to ask CDragon whether a new patch is out
+STATIC_DATA_CHECK_INTERVAL = float(os.getenv("STATIC_DATA_CHECK_INTERVAL", "3600"))
+
+class StaticData:
+    """Lookup tables built once from CDragon's tft/en_us.json"""
+
+    def __init__(self, patch, unit_traits, traits, items, set_units):
+        self.patch = patch
+        self.unit_traits = unit_traits  # unit apiName -> native trait display names
+        self.traits = traits            # trait apiName -> {'name', 'icon', 'breakpoints'}
+        self.items = items              # item apiName -> {'name', 'icon'}
+        self.set_units = set_units      # set number (str) -> unit apiNames
+
+    def native_traits(self, unit_name):
+        return self.unit_traits.get(unit_name, [])
+
+    def to_dict(self):
+        return {
+            'patch': self.patch,
+            'unit_traits': self.unit_traits,
+            'traits': self.traits,
+            'items': self.items,
+            'set_units': self.set_units
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['patch'], data['unit_traits'], data['traits'], data['items'], data['set_units'])
+
+def build_index(cd_data, patch):
+    """Flatten the CDragon tree into StaticData in a single pass"""
+    unit_traits = {}
+    # Pre-order walk, first match wins: the same unit the old recursive
+    # apiName search would have found
+    stack = [cd_data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            api_name = obj.get('apiName')
+            if api_name and obj.get('traits') and isinstance(obj['traits'], list):
+                unit_traits.setdefault(api_name, obj['traits'])
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+
+    traits = {}
+    set_units = {}
+    set_entries = list(cd_data.get('setData', []))
+    set_entries += [dict(entry, number=number) for number, entry in cd_data.get('sets', {}).items()]
+    for entry in set_entries:
+        number = str(entry.get('number'))
+        for champion in entry.get('champions', []):
+            api_name = champion.get('apiName')
+            if api_name and api_name not in set_units.setdefault(number, []):
+                set_units[number].append(api_name)
+        for trait in entry.get('traits', []):
+            api_name = trait.get('apiName')
+            if api_name and api_name not in traits:
+                traits[api_name] = {
+                    'name': trait.get('name'),
+                    'icon': trait.get('icon'),
+                    'breakpoints': [effect.get('minUnits') for effect in trait.get('effects', [])]
+                }
+
+    items = {}
+    for item in cd_data.get('items', []):
+        api_name = item.get('apiName')
+        if api_name and api_name not in items:
+            items[api_name] = {'name': item.get('name'), 'icon': item.get('icon')}
+
+    return StaticData(patch, unit_traits, traits, items, set_units)
+
+def fetch_patch_version():
+    resp = http_client.get(f"{CDRAGON_BASE_URL}/content-metadata.json", timeout=10)
+    resp.raise_for_status()
+    version = resp.json()['version']
+    # e.g. "14.24.641.1234" -> "14.24"
+    return '.'.join(version.split('.')[:2])
+
+def patch_dir(patch):
+    return os.path.join(STATIC_DATA_DIR, patch)
+
+def local_patches():
+    if not os.path.isdir(STATIC_DATA_DIR):
+        return []
+    patches = [p for p in os.listdir(STATIC_DATA_DIR) if os.path.exists(os.path.join(patch_dir(p), 'index.json'))]
+    return sorted(patches, key=lambda p: [int(part) if part.isdigit() else part for part in p.split('.')])
+
+def download_patch(patch):
+    """Download en_us.json for a patch and store the raw file (gzipped) plus the prebuilt index"""
+    print(f"Downloading Community Dragon data for patch {patch}...")
+    resp = http_client.get(f"{CDRAGON_BASE_URL}/cdragon/tft/en_us.json", timeout=60)
+    resp.raise_for_status()
+    cd_data = resp.json()
+
+    directory = patch_dir(patch)
+    os.makedirs(directory, exist_ok=True)
+    with gzip.open(os.path.join(directory, 'en_us.json.gz'), 'wt', encoding='utf-8') as f:
+        json.dump(cd_data, f)
+
+    static = build_index(cd_data, patch)
+    # Write then rename so a half-written index is never picked up
+    tmp_path = os.path.join(directory, 'index.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(static.to_dict(), f)
+    os.replace(tmp_path, os.path.join(directory, 'index.json'))
+    return static
+
+def load_patch(patch):
+    with open(os.path.join(patch_dir(patch), 'index.json'), encoding='utf-8') as f:
+        return StaticData.from_dict(json.load(f))
+
+_static = None
+_next_check = 0.0
+_lock = threading.Lock()
+# One CDragon check or download at a time; readers never wait on it once data is loaded
+_refresh_lock = threading.Lock()
+
+def refresh_static_data(force=False):
+    """Ask CDragon for the current patch and swap in its data, downloading it if it isn't stored"""
+    global _static, _next_check
+
+    with _refresh_lock:
+        # Callers queued behind a refresh that just finished can use its result
+        if _static is not None and not force and time.time() < _next_check:
+            return _static
+
+        static = _static
+        try:
+            patch = fetch_patch_version()
+            if static is None or static.patch != patch:
+                static = load_patch(patch) if patch in local_patches() else download_patch(patch)
+            next_check = time.time() + STATIC_DATA_CHECK_INTERVAL
+        except Exception as e:
+            print(f"Warning: Could not refresh Community Dragon data: {e}")
+            if static is None:
+                patches = local_patches()
+                static = load_patch(patches[-1]) if patches else StaticData(None, {}, {}, {}, {})
+            # Try again soon rather than hammering CDragon on every request
+            next_check = time.time() + 60
+
+        with _lock:
+            _static, _next_check = static, next_check
+        return static
+
+def get_static_data(force_check=False):
+    """Return the current StaticData, downloading it only when CDragon reports a new patch.
+
+    Only the first call (or force_check) waits for CDragon. After that, a due
+    check runs in the background and callers keep getting the current data.
+    """
+    global _next_check
+
+    static = _static
+    if static is None or force_check:
+        return refresh_static_data(force=force_check)
+
+    with _lock:
+        due = time.time() >= _next_check
+        if due:
+            # Claimed, so concurrent callers don't start checks of their own
+            _next_check = time.time() + 60
+    if due:
+        threading.Thread(target=refresh_static_data, args=(True,), daemon=True).start()
+    return static
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local Community Dragon static data store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("update", help="download the current patch if it isn't stored yet")
+    sub.add_parser("list", help="list stored patches")
+    unit = sub.add_parser("unit", help="show a unit's native traits")
+    unit.add_argument("api_name")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        static = get_static_data(force_check=True)
+        print(f"Patch {static.patch}: {len(static.unit_traits)} units, {len(static.traits)} traits, {len(static.items)} items")
+    elif args.command == "list":
+        for patch in local_patches():
+            print(patch)
+    elif args.command == "unit":
+        print(get_static_data().native_traits(args.api_name))
+
+if __name__ == "__main__":
+    main()
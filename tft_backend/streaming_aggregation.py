@@ -0,0 +1,357 @@
+import argparse
+import gzip
+import json
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from aggregation import top_bottom
+from combo_stats import ITEM_SLOTS, most_played, pack_item_set, unit_report, unpack_item_set
+from match_cache import MatchCache, match_cache
+from match_data import configured_set, parse_lobby, parse_participant, trait_prefix
+from match_table import Vocabulary
+
+load_dotenv()
+AGGREGATION_WORKERS = int(os.getenv("AGGREGATION_WORKERS", str(os.cpu_count() or 1)))
+
+# Trait/item/unit stats over match archives too big to load at once. Matches
+# are read one at a time and folded into small counters (one entry per
+# distinct trait, item or unit item set), so memory depends on the number of
+# entities, not matches. Counters merge associatively, so shards can also be
+# counted on separate processes (aggregate_parallel).
+
+class PlacementCounter:
+    """Mergeable appearance and top-4 counts per key.
+
+    Keys keep first-seen order and merge() appends the other counter's new keys
+    after this one's, so merging partial counters in stream order reproduces
+    the tie order placement_rates gives over the whole table.
+    """
+
+    def __init__(self):
+        self.counts = {}  # key -> [appearances, top 4 appearances]
+
+    def add(self, key, placement):
+        entry = self.counts.get(key)
+        if entry is None:
+            entry = self.counts[key] = [0, 0]
+        entry[0] += 1
+        if placement <= 4:
+            entry[1] += 1
+
+    def merge(self, other):
+        for key, (games, top4) in other.counts.items():
+            entry = self.counts.get(key)
+            if entry is None:
+                self.counts[key] = [games, top4]
+            else:
+                entry[0] += games
+                entry[1] += top4
+        return self
+
+    def rates(self, label, min_count=10):
+        """Same frame as aggregation.placement_rates, or None if nothing clears min_count"""
+        rows = [(key, games, top4) for key, (games, top4) in self.counts.items() if games > min_count]
+        if not rows:
+            return None
+        return pd.DataFrame({
+            label: [key for key, _, _ in rows],
+            'Top 4 Rate': [top4 / games for _, games, top4 in rows],
+            'Bottom 4 Rate': [(games - top4) / games for _, games, top4 in rows],
+            'Games Played': [games for _, games, _ in rows]
+        })
+
+def add_placement(stats, key, placement):
+    entry = stats.get(key)
+    if entry is None:
+        stats[key] = [1, placement]
+    else:
+        entry[0] += 1
+        entry[1] += placement
+
+def merge_placements(stats, other):
+    for key, (games, placement_sum) in other.items():
+        entry = stats.get(key)
+        if entry is None:
+            stats[key] = [games, placement_sum]
+        else:
+            entry[0] += games
+            entry[1] += placement_sum
+
+# Item codes in a UnitCounter's packed keys stay below this, so keys never need re-encoding as items are seen
+ITEM_CODE_BASE = 1 << 16
+
+class UnitCounter:
+    """Mergeable per-unit counts behind unit_analysis.analyze_units.
+
+    For every unit: appearances (first-seen order), and games plus placement
+    sums for each of its 1-3 item sets and each trait active on its boards.
+    Item sets use ComboStats' packed (unit, item, item, item) keys over this
+    counter's own unit and item vocabularies; merge() re-keys the other
+    counter's sets into them.
+    """
+
+    def __init__(self):
+        self.instances = {}  # unit -> appearances
+        self.unit_ids = Vocabulary()
+        self.item_ids = Vocabulary()
+        self.item_sets = {}  # packed (unit, item set) key -> [games, placement sum]
+        self.traits = {}     # unit -> {trait: [games, placement sum]}
+
+    def add_row(self, row):
+        placement = row['placement']
+        prefix = trait_prefix(row['set_number'])
+        traits = [trait.replace(prefix, '') for trait in row['traits']]
+        for unit, items in zip(row['units'], row['items']):
+            self.instances[unit] = self.instances.get(unit, 0) + 1
+            # Same item sets as analyze_unit: the first three slots, sorted by name
+            fields = [self.item_ids.intern(item) + 1 for item in sorted(item for item in items[:ITEM_SLOTS] if item)]
+            unit_id = self.unit_ids.intern(unit)
+            for mask in range(1, 2 ** len(fields)):
+                chosen = [field for slot, field in enumerate(fields) if mask >> slot & 1]
+                add_placement(self.item_sets, pack_item_set(unit_id, chosen, ITEM_CODE_BASE), placement)
+            unit_traits = self.traits.setdefault(unit, {})
+            for trait in traits:
+                add_placement(unit_traits, trait, placement)
+
+    def merge(self, other):
+        for unit, count in other.instances.items():
+            self.instances[unit] = self.instances.get(unit, 0) + count
+        unit_map = [self.unit_ids.intern(name) for name in other.unit_ids.names]
+        field_map = [self.item_ids.intern(name) + 1 for name in other.item_ids.names]
+        rekeyed = {}
+        for key, stats in other.item_sets.items():
+            unit, codes = unpack_item_set(key, ITEM_CODE_BASE)
+            rekeyed[pack_item_set(unit_map[unit], [field_map[code] for code in codes], ITEM_CODE_BASE)] = stats
+        merge_placements(self.item_sets, rekeyed)
+        for unit, traits in other.traits.items():
+            merge_placements(self.traits.setdefault(unit, {}), traits)
+        return self
+
+    def unit_item_sets(self, unit_name):
+        """{'Item A | Item B': [games, placement sum]} for one unit"""
+        unit = self.unit_ids.ids.get(unit_name)
+        if unit is None:
+            return {}
+        item_sets = {}
+        for key, stats in self.item_sets.items():
+            key_unit, codes = unpack_item_set(key, ITEM_CODE_BASE)
+            if key_unit == unit:
+                item_sets[' | '.join(self.item_ids.names[code] for code in codes)] = stats
+        return item_sets
+
+    def unit_report(self, unit_name, static_data, top_n=10, min_games=3):
+        """Same result as unit_analysis.analyze_unit over the counted boards"""
+        return unit_report(unit_name, self.instances.get(unit_name, 0), self.unit_item_sets(unit_name),
+                           self.traits.get(unit_name, {}), static_data.native_traits(unit_name), top_n, min_games)
+
+    def top_units(self, static_data, limit=10):
+        """The ten most played units' reports, as analyze_units lists them"""
+        top_units = []
+        for unit, count in most_played(self.instances, limit):
+            if count >= 3:
+                analysis = self.unit_report(unit, static_data, top_n=5, min_games=2)
+                analysis['total_games'] = int(count)
+                top_units.append(analysis)
+        return top_units
+
+class MatchAggregate:
+    """Trait, item and (optionally) unit counters for a stream of boards; partial aggregates merge associatively"""
+
+    def __init__(self, units=False):
+        self.boards = 0
+        self.unit_instances = 0
+        self.traits = PlacementCounter()
+        self.items = PlacementCounter()
+        self.units = UnitCounter() if units else None
+
+    def add_row(self, row):
+        placement = row['placement']
+        self.boards += 1
+        self.unit_instances += len(row['units'])
+        for trait in row['traits']:
+            self.traits.add(trait, placement)
+        for items in row['items']:
+            for item in items:
+                self.items.add(item, placement)
+        if self.units is not None:
+            self.units.add_row(row)
+
+    def merge(self, other):
+        self.boards += other.boards
+        self.unit_instances += other.unit_instances
+        self.traits.merge(other.traits)
+        self.items.merge(other.items)
+        if self.units is not None:
+            self.units.merge(other.units)
+        return self
+
+    def trait_results(self, n=10):
+        """(top, bottom) records, as trait_analysis.analyze_traits returns them"""
+        rates = self.traits.rates('Trait', min_count=10)
+        if rates is None:
+            raise Exception("No traits found with sufficient frequency")
+        return top_bottom(rates, n)
+
+    def item_results(self, n=10):
+        """(top, bottom) records, as item_analysis.analyze_items returns them"""
+        rates = self.items.rates('Item', min_count=10)
+        if rates is None:
+            raise Exception("No items found with sufficient frequency")
+        return top_bottom(rates, n)
+
+def iter_match_files(paths):
+    """Yield match payloads from .json (one match), .jsonl (one per line) files, optionally gzipped, or directories of them"""
+    for path in list_match_files(paths):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            if path.endswith(('.jsonl', '.jsonl.gz')):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield json.load(f)
+
+def iter_boards(matches, puuid=None, tft_set=None):
+    """Yield parsed boards in tft_set: just puuid's when given, otherwise all eight per match"""
+    tft_set = configured_set(tft_set)
+    for match_data in matches:
+        if match_data.get('info', {}).get('tft_set_number') != tft_set:
+            continue
+        if puuid is None:
+            for _, row in parse_lobby(match_data):
+                yield row
+        else:
+            row = parse_participant(match_data, puuid)
+            if row is not None:
+                yield row
+
+def aggregate_chunks(boards, chunk_size=10000, units=False):
+    """Yield one MatchAggregate per chunk_size boards"""
+    partial = MatchAggregate(units)
+    for row in boards:
+        partial.add_row(row)
+        if partial.boards >= chunk_size:
+            yield partial
+            partial = MatchAggregate(units)
+    if partial.boards:
+        yield partial
+
+def aggregate(boards, chunk_size=10000, units=False):
+    """Fold a stream of boards into one MatchAggregate, merging chunk by chunk in stream order"""
+    total = MatchAggregate(units)
+    for partial in aggregate_chunks(boards, chunk_size, units):
+        total.merge(partial)
+    return total
+
+# A worker's own cache connection: a SQLite connection can't be used across a fork
+worker_cache = None
+
+def open_worker_cache(path):
+    """Process pool initializer: open the match cache afresh in each worker"""
+    global worker_cache
+    worker_cache = MatchCache(path, match_cache.max_bytes)
+
+def iter_cached(match_ids):
+    # Read-only, so several worker processes can share the cache file
+    cache = worker_cache or match_cache
+    for match_id in match_ids:
+        match_data = cache.get(match_id, touch=False)
+        if match_data is not None:
+            yield match_data
+
+def aggregate_shard(shard):
+    """Worker entry point: aggregate one contiguous shard of files or cached match IDs"""
+    source, keys, puuid, tft_set, units = shard
+    matches = iter_match_files(keys) if source == 'files' else iter_cached(keys)
+    return aggregate(iter_boards(matches, puuid, tft_set), units=units)
+
+def list_match_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if name.endswith(('.json', '.jsonl', '.json.gz', '.jsonl.gz')))
+        else:
+            files.append(path)
+    return files
+
+def aggregate_parallel(paths=None, puuid=None, tft_set=None, workers=AGGREGATION_WORKERS, units=False,
+                       shards_per_worker=4):
+    """Aggregate match files (or the whole match cache when paths is None) on a process pool.
+
+    Inputs are split into contiguous shards in stream order and the partial
+    aggregates are merged back in that order, so the result is identical to
+    the single-process aggregate().
+    """
+    if paths is None:
+        source, keys = 'cache', match_cache.match_ids()
+    else:
+        source, keys = 'files', list_match_files(paths)
+
+    shard_count = max(1, min(len(keys), workers * shards_per_worker))
+    size = -(-len(keys) // shard_count) if keys else 0
+    shards = [(source, keys[start:start + size], puuid, tft_set, units) for start in range(0, len(keys), size or 1)]
+
+    total = MatchAggregate(units)
+    if workers <= 1:
+        for shard in shards:
+            total.merge(aggregate_shard(shard))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=open_worker_cache,
+                             initargs=(match_cache.path,)) as executor:
+        # map() yields in submission order, which keeps first-seen order intact
+        for partial in executor.map(aggregate_shard, shards):
+            total.merge(partial)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream trait/item stats over stored match archives")
+    parser.add_argument("paths", nargs="*", help="match .json/.jsonl(.gz) files or directories")
+    parser.add_argument("--cache", action="store_true", help="read every match in the local match cache")
+    parser.add_argument("--puuid", help="only this player's boards (default: every board)")
+    parser.add_argument("--set", dest="tft_set", type=int, default=configured_set())
+    parser.add_argument("--chunk-size", type=int, default=10000, help="boards per partial aggregate")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"aggregate on this many processes (this machine: {AGGREGATION_WORKERS})")
+    parser.add_argument("--units", action="store_true", help="also compute the unit item-set/trait report")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    if not args.paths and not args.cache:
+        parser.error("give match files/directories or --cache")
+
+    if args.workers > 1:
+        total = aggregate_parallel(args.paths or None, args.puuid, args.tft_set, args.workers, args.units)
+    else:
+        matches = iter_match_files(args.paths) if args.paths else (payload for _, payload in match_cache.iter_matches())
+        total = aggregate(iter_boards(matches, args.puuid, args.tft_set), args.chunk_size, args.units)
+
+    results = {'tft_set': args.tft_set, 'boards': total.boards}
+    for kind, compute in (('traits', total.trait_results), ('items', total.item_results)):
+        try:
+            top, bottom = compute()
+            results[kind] = {f'top_{kind}': top, f'bottom_{kind}': bottom}
+        except Exception as e:
+            results[kind] = {'error': str(e)}
+    if args.units:
+        from static_data import get_static_data
+        results['units'] = {
+            'total_games_analyzed': total.boards,
+            'total_unit_instances': total.unit_instances,
+            'top_units': total.units.top_units(get_static_data())
+        }
+
+    print(f"Aggregated {total.boards} Set {args.tft_set} boards")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+import tempfile
+import pytest
+
+# Backend modules import each other by bare name, as they do when run from tft_backend/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+# URL.py (the asset mirror) lives at the repository root
+sys.path.append(os.path.dirname(BACKEND_DIR))
+
+# Keep caches and databases created at import time out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="tft-tests-"))
+
+# Importable now that benchmarks/ is on the path
+from fixtures import bench_puuid, player_match_ids, synthetic_match
+
+# tests/golden/analysis.json holds the original iterrows/DataFrame analyzers'
+# output for golden_matches, so the encoded, vectorized pipeline has to
+# reproduce it exactly
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'analysis.json')
+PLAYER = 3
+
+@pytest.fixture(scope='session')
+def golden_puuid():
+    return bench_puuid(PLAYER)
+
+@pytest.fixture(scope='session')
+def golden_matches():
+    """60 synthetic matches for PLAYER, every tenth from Set 13, items folded into six names"""
+    matches = []
+    for index, match_id in enumerate(player_match_ids(PLAYER, 60)):
+        match_data = synthetic_match(match_id, tft_set=13 if index % 10 == 0 else 14)
+        # A small item pool gives item sets (including doubled items) enough games to be reported
+        for participant in match_data['info']['participants']:
+            for unit in participant['units']:
+                unit['itemNames'] = [f"TFT_Item_Item{int(name.rsplit('Item', 1)[1]) % 6}" for name in unit['itemNames']]
+        matches.append(match_data)
+    return matches
+
+@pytest.fixture(scope='session')
+def golden():
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+@pytest.fixture(scope='session')
+def as_json():
+    """Round-trips analyzer output through JSON (numpy scalars included) for comparison with golden"""
+    return lambda value: json.loads(json.dumps(value, default=lambda o: o.item()))
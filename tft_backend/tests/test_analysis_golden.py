@@ -0,0 +1,29 @@
+import pytest
+import item_analysis
+import trait_analysis
+import unit_analysis
+from fixtures import synthetic_static_data
+from match_data import parse_participant, table_from_history
+from static_data import build_index
+
+# Expected outputs are in tests/golden/analysis.json; see the golden fixtures in conftest.py
+UNIT = 'TFT14_Champion7'
+
+@pytest.fixture(scope='module')
+def table(golden_matches, golden_puuid):
+    history = [(m['metadata']['match_id'], parse_participant(m, golden_puuid)) for m in golden_matches]
+    return table_from_history(history, 14)
+
+def test_traits(table, golden, as_json):
+    top, bottom = trait_analysis.analyze_traits(table)
+    assert as_json({'top': top, 'bottom': bottom}) == golden['traits']
+
+def test_items(table, golden, as_json):
+    top, bottom = item_analysis.analyze_items(table)
+    assert as_json({'top': top, 'bottom': bottom}) == golden['items']
+
+def test_units(table, golden, as_json, monkeypatch):
+    static_data = build_index(synthetic_static_data(), '14.24')
+    monkeypatch.setattr(unit_analysis, 'get_static_data', lambda: static_data)
+    assert as_json(unit_analysis.analyze_units(table)) == golden['units']
+    assert as_json(unit_analysis.analyze_units(table, UNIT)) == golden['unit']
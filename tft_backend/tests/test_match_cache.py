@@ -0,0 +1,41 @@
+from match_cache import MatchCache
+
+def payload(match_id, filler=0):
+    return {'metadata': {'match_id': match_id}, 'info': {'participants': [], 'filler': 'x' * filler}}
+
+def stored_bytes(cache):
+    return cache.conn.execute("SELECT COALESCE(SUM(size), 0) FROM matches").fetchone()[0]
+
+def test_reads_do_not_write(tmp_path):
+    cache = MatchCache(str(tmp_path / 'matches.sqlite3'), 1 << 30, touch_interval=3600)
+    cache.put('NA1_1', payload('NA1_1'))
+    changes = cache.conn.total_changes
+    for _ in range(10):
+        assert cache.get('NA1_1') == payload('NA1_1')
+    assert cache.conn.total_changes == changes
+    assert cache.touched == {}
+
+def test_stale_access_times_are_flushed_with_the_next_put(tmp_path):
+    cache = MatchCache(str(tmp_path / 'matches.sqlite3'), 1 << 30, touch_interval=0)
+    cache.put('NA1_1', payload('NA1_1'))
+    cache.get('NA1_1')
+    assert 'NA1_1' in cache.touched
+    cache.put('NA1_2', payload('NA1_2'))
+    assert cache.touched == {}
+
+def test_running_total_and_eviction(tmp_path):
+    path = str(tmp_path / 'matches.sqlite3')
+    cache = MatchCache(path, 1 << 30)
+    for index in range(20):
+        cache.put(f'NA1_{index}', payload(f'NA1_{index}', 2000 + index))
+    cache.put('NA1_3', payload('NA1_3', 50000))  # replacing an entry swaps its size
+    assert cache.total_bytes == stored_bytes(cache)
+
+    # A new process starts from the stored total, and evicts the least recently used down to 90%
+    reopened = MatchCache(path, stored_bytes(cache) - 1)
+    reopened.get('NA1_0', touch=False)
+    assert reopened.total_bytes == stored_bytes(cache)
+    reopened.put('NA1_20', payload('NA1_20', 2000))
+    assert reopened.total_bytes == stored_bytes(reopened) <= reopened.max_bytes * 0.9
+    assert reopened.get('NA1_20', touch=False) is not None
+    assert reopened.get('NA1_0', touch=False) is None
@@ -0,0 +1,91 @@
+import match_data
+from match_history import MATCH_RETRY_LIMIT, PlayerHistoryStore
+
+PUUID = 'player-a'
+
+def match_payload(match_id, game_datetime, puuids=(PUUID,)):
+    participants = [
+        {'placement': index + 1, 'level': 8, 'traits': [], 'units': []}
+        for index in range(len(puuids))
+    ]
+    return {
+        'metadata': {'match_id': match_id, 'participants': list(puuids)},
+        'info': {'tft_set_number': 14, 'game_datetime': game_datetime, 'participants': participants},
+    }
+
+def use_store(monkeypatch, tmp_path):
+    store = PlayerHistoryStore(str(tmp_path / 'history.sqlite3'))
+    monkeypatch.setattr(match_data, 'history_store', store)
+    return store
+
+def test_failed_download_is_retried_after_the_watermark_passes_it(monkeypatch, tmp_path):
+    store = use_store(monkeypatch, tmp_path)
+    payloads = {f'NA1_{i}': match_payload(f'NA1_{i}', i * 1000) for i in (1, 2, 3)}
+    down = {'NA1_2'}
+    monkeypatch.setattr(match_data, 'get_match_ids', lambda puuid, **kwargs: ['NA1_3', 'NA1_2', 'NA1_1'])
+    monkeypatch.setattr(match_data, 'get_new_match_ids', lambda puuid, start_time, **kwargs: ['NA1_3'])
+    monkeypatch.setattr(match_data, 'fetch_matches',
+                        lambda ids, progress=None: [None if i in down else payloads[i] for i in ids])
+
+    match_data.store_matches(PUUID, match_data.pending_match_ids(PUUID))
+    assert store.watermark(PUUID) == ('NA1_3', 3000)
+    assert store.failed_match_ids(PUUID) == ['NA1_2']
+
+    down.clear()
+    assert match_data.pending_match_ids(PUUID) == ['NA1_2']
+    match_data.store_matches(PUUID, ['NA1_2'])
+    assert [match_id for match_id, _ in store.recent_matches(PUUID, 10)] == ['NA1_3', 'NA1_2', 'NA1_1']
+    assert store.failed_match_ids(PUUID) == []
+
+def test_failed_match_is_given_up_after_the_retry_limit(tmp_path):
+    store = PlayerHistoryStore(str(tmp_path / 'history.sqlite3'))
+    for _ in range(MATCH_RETRY_LIMIT):
+        store.add_matches(PUUID, [], failed=['NA1_9'])
+    assert store.failed_match_ids(PUUID) == []
+
+def test_harvested_lobby_rows_do_not_move_the_watermark(monkeypatch, tmp_path):
+    store = use_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(match_data, 'INGEST_LOBBIES', True)
+    monkeypatch.setattr(match_data, 'fetch_matches',
+                        lambda ids, progress=None: [match_payload('NA1_5', 5000, ('player-b', PUUID))])
+
+    # player-b's sync harvests player-a's board from their shared lobby
+    match_data.store_matches('player-b', ['NA1_5'])
+    assert store.watermark('player-b') == ('NA1_5', 5000)
+    assert store.watermark(PUUID) is None
+
+    store.add_matches(PUUID, [('NA1_1', 1000, {})])
+    assert store.watermark(PUUID) == ('NA1_1', 1000)
+
+def test_recent_sync_skips_the_match_ids_call(monkeypatch, tmp_path):
+    use_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(match_data, 'recent_syncs', match_data.TTLCache(10, 60))
+    calls = []
+    monkeypatch.setattr(match_data, 'get_match_ids', lambda puuid, **kwargs: calls.append(puuid) or ['NA1_1'])
+    monkeypatch.setattr(match_data, 'fetch_matches', lambda ids, progress=None: [match_payload('NA1_1', 1000)])
+
+    first = match_data.sync_player_history(PUUID)
+    second = match_data.sync_player_history(PUUID)
+
+    assert calls == [PUUID]
+    assert first == second
+
+def test_batched_sync_stores_oldest_first_and_marks_the_player_fresh(monkeypatch, tmp_path):
+    store = use_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(match_data, 'recent_syncs', match_data.TTLCache(10, 60))
+    ids = [f'NA1_{i}' for i in (5, 4, 3, 2, 1)]
+    calls = []
+    monkeypatch.setattr(match_data, 'get_match_ids', lambda puuid, **kwargs: calls.append(puuid) or ids)
+    monkeypatch.setattr(match_data, 'fetch_matches',
+                        lambda batch, progress=None: [match_payload(i, int(i[4:]) * 1000) for i in batch])
+
+    batches = []
+    def on_batch(fetched, total):
+        batches.append((fetched, total, store.watermark(PUUID)))
+
+    match_data.sync_player_history(PUUID, on_batch=on_batch, batch_size=2)
+    assert batches == [(0, 5, None), (2, 5, ('NA1_2', 2000)), (4, 5, ('NA1_4', 4000)), (5, 5, ('NA1_5', 5000))]
+
+    # The stream's sync counts as fresh for the other routes
+    match_data.sync_player_history(PUUID)
+    assert calls == [PUUID]
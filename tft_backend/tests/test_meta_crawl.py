@@ -0,0 +1,20 @@
+import meta_crawl
+from fixtures import player_match_ids, synthetic_match
+from meta_crawl import MetaStore
+
+def test_malformed_match_is_skipped_and_marked_crawled(monkeypatch, tmp_path):
+    store = MetaStore(str(tmp_path / 'meta.sqlite3'))
+    monkeypatch.setattr(meta_crawl, 'meta_store', store)
+    match_ids = player_match_ids(1, 3)
+    payloads = {match_id: synthetic_match(match_id) for match_id in match_ids}
+    del payloads[match_ids[1]]['info']['participants'][3]['placement']
+    monkeypatch.setattr(meta_crawl, 'get_new_match_ids', lambda puuid, *args: match_ids)
+    monkeypatch.setattr(meta_crawl, 'fetch_matches', lambda ids: [payloads[i] for i in ids])
+
+    stats = meta_crawl.crawl(14, ['bench-puuid-000001'])
+
+    assert stats['matches'] == 3
+    assert store.unseen_match_ids(match_ids) == []
+    # Only the two good lobbies are counted, none of the malformed one's boards
+    assert sum(games for _, games, _, _ in store.counts(14, 'traits')) == sum(
+        len(p['traits']) for i in (0, 2) for p in payloads[match_ids[i]]['info']['participants'])
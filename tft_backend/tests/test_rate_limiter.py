@@ -0,0 +1,41 @@
+from rate_limiter import RateLimiter, parse_rate_limits
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def max_in_window(times, seconds):
+    start = 0
+    best = 0
+    for end, sent in enumerate(times):
+        while times[start] <= sent - seconds:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+def test_no_window_admits_more_than_its_limit():
+    clock = FakeClock()
+    limits = parse_rate_limits("20:1,100:120")
+    limiter = RateLimiter(limits, clock=clock, sleep=clock.sleep)
+
+    sent = []
+    for _ in range(450):
+        limiter.acquire()
+        sent.append(clock.now)
+
+    for count, seconds in limits:
+        assert max_in_window(sent, seconds) == count
+
+def test_pause_holds_back_the_next_request():
+    clock = FakeClock()
+    limiter = RateLimiter([(20, 1)], clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+    limiter.pause(5)
+    limiter.acquire()
+    assert clock.now >= 5
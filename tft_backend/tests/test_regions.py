@@ -0,0 +1,31 @@
+import pytest
+from regions import PLATFORM_ALIASES, PLATFORM_REGIONS, REGIONS, match_region, resolve_region
+
+EXPECTED = {
+    'NA1': 'americas', 'BR1': 'americas', 'LA1': 'americas', 'LA2': 'americas',
+    'EUW1': 'europe', 'EUN1': 'europe', 'TR1': 'europe', 'RU': 'europe', 'ME1': 'europe',
+    'KR': 'asia', 'JP1': 'asia',
+    'OC1': 'sea', 'PH2': 'sea', 'SG2': 'sea', 'TH2': 'sea', 'TW2': 'sea', 'VN2': 'sea',
+}
+
+@pytest.mark.parametrize('platform, region', sorted(EXPECTED.items()))
+def test_platform_and_match_prefix(platform, region):
+    assert resolve_region(platform.lower()) == region
+    assert match_region(f"{platform}_1234567890") == region
+
+@pytest.mark.parametrize('alias, platform', sorted(PLATFORM_ALIASES.items()))
+def test_alias(alias, platform):
+    assert resolve_region(alias.lower()) == EXPECTED[platform]
+
+def test_every_platform_has_an_alias():
+    assert set(PLATFORM_ALIASES.values()) == set(PLATFORM_REGIONS) == set(EXPECTED)
+
+@pytest.mark.parametrize('region', REGIONS)
+def test_region_names(region):
+    assert resolve_region(f" {region.upper()} ") == region
+
+def test_blank_and_unknown():
+    assert resolve_region('') is None
+    assert resolve_region(None) is None
+    with pytest.raises(Exception):
+        resolve_region('moon1')
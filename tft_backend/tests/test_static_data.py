@@ -0,0 +1,32 @@
+import threading
+import static_data
+from static_data import StaticData
+
+def test_due_check_runs_in_the_background(monkeypatch):
+    current = StaticData('14.23', {}, {}, {}, {})
+    newer = StaticData('14.24', {}, {}, {}, {})
+    monkeypatch.setattr(static_data, '_static', current)
+    monkeypatch.setattr(static_data, '_next_check', 0.0)
+
+    release, swapped = threading.Event(), threading.Event()
+    checks = []
+    def fetch_patch_version():
+        checks.append(1)
+        release.wait(5)
+        return '14.24'
+    def load_patch(patch):
+        swapped.set()
+        return newer
+    monkeypatch.setattr(static_data, 'fetch_patch_version', fetch_patch_version)
+    monkeypatch.setattr(static_data, 'local_patches', lambda: ['14.23', '14.24'])
+    monkeypatch.setattr(static_data, 'load_patch', load_patch)
+
+    # The slow check doesn't hold up readers, and only one check starts
+    assert static_data.get_static_data() is current
+    assert static_data.get_static_data() is current
+    release.set()
+    assert swapped.wait(5)
+    static_data._refresh_lock.acquire()
+    static_data._refresh_lock.release()
+    assert static_data.get_static_data() is newer
+    assert len(checks) == 1
@@ -0,0 +1,46 @@
+import json
+import streaming_aggregation
+from fixtures import player_match_ids, synthetic_match
+from match_cache import MatchCache
+from streaming_aggregation import aggregate, aggregate_parallel, iter_boards
+
+MATCHES = [synthetic_match(match_id) for match_id in player_match_ids(1, 120)]
+
+def counts(total):
+    return (total.boards, total.unit_instances, total.traits.counts, total.items.counts,
+            total.units.instances, total.units.item_sets, total.units.traits)
+
+def test_parallel_files_match_serial(tmp_path):
+    paths = []
+    for shard in range(6):
+        path = tmp_path / f"shard{shard}.jsonl"
+        path.write_text(''.join(json.dumps(m) + '\n' for m in MATCHES[shard::6]))
+        paths.append(str(path))
+
+    serial = aggregate(iter_boards(streaming_aggregation.iter_match_files(paths)), chunk_size=97, units=True)
+    parallel = aggregate_parallel(paths, workers=3, units=True)
+
+    assert counts(parallel) == counts(serial)
+    # First-seen order decides ties in the reports, so it has to survive the merge too
+    assert list(parallel.traits.counts) == list(serial.traits.counts)
+    assert parallel.trait_results() == serial.trait_results()
+    assert parallel.item_results() == serial.item_results()
+
+def test_parallel_cache_matches_serial(monkeypatch, tmp_path):
+    cache = MatchCache(str(tmp_path / 'matches.sqlite3'), 1 << 30)
+    for match_data in MATCHES:
+        cache.put(match_data['metadata']['match_id'], match_data)
+    monkeypatch.setattr(streaming_aggregation, 'match_cache', cache)
+
+    # Open the parent's connection before the pool starts, as the CLI does
+    serial = aggregate(iter_boards(payload for _, payload in cache.iter_matches()), units=True)
+    parallel = aggregate_parallel(workers=3, units=True)
+
+    assert counts(parallel) == counts(serial)
+    assert list(parallel.items.counts) == list(serial.items.counts)
+
+def test_unit_traits_drop_their_own_set_prefix():
+    counter = streaming_aggregation.UnitCounter()
+    counter.add_row({'set_number': 15, 'placement': 2, 'traits': ['TFT15_Bastion'],
+                     'units': ['TFT15_Garen'], 'items': [[]]})
+    assert counter.traits == {'TFT15_Garen': {'Bastion': [1, 2]}}
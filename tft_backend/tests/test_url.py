@@ -0,0 +1,18 @@
+from URL import target_prefixes
+
+PATHS = [
+    "game/assets/characters/tft1_ahri/hud/tft1_ahri_square.tex",
+    "game/assets/characters/tft10_ahri/hud/tft10_ahri_square.tex",
+    "game/assets/characters/tft13_jinx/hud/tft13_jinx_square.tex",
+    "game/assets/characters/tft14_jinx/hud/tft14_jinx_square.tex",
+    "game/assets/maps/tft/icons/items/hexcore/tft_item_bfsword.tex",
+]
+
+def matching(tft_set):
+    return [path for path in PATHS if path.startswith(target_prefixes(tft_set))]
+
+def test_set_1_does_not_match_later_sets():
+    assert matching(1) == [PATHS[0], PATHS[4]]
+
+def test_two_digit_set():
+    assert matching(13) == [PATHS[2], PATHS[4]]